@@ -10,7 +10,12 @@ from she_logging import logger
 
 from dhos_questions_api.blueprint_api import api_blueprint
 from dhos_questions_api.blueprint_development import development
+from dhos_questions_api.config import Configuration
 from dhos_questions_api.helper.cli import add_cli_command
+from dhos_questions_api.helper.export import init_shard_exporter
+from dhos_questions_api.helper.export_jobs import init_export_jobs
+from dhos_questions_api.helper.question_catalog import init_question_catalog
+from dhos_questions_api.helper.security import forget_surveys
 
 
 def create_app(
@@ -33,9 +38,24 @@ def create_app(
         testing=testing,
     )
 
+    # Load the service configuration
+    app.config.from_object(Configuration)
+
     # Configure the SQL database
     init_db(app=app, testing=testing)
 
+    # Configure the question catalog cache
+    init_question_catalog(app)
+
+    # Configure the threads and connections that survey responses are exported with
+    init_shard_exporter(app)
+
+    # Configure the background workers for survey responses export jobs
+    init_export_jobs(app)
+
+    # Forget the surveys loaded for ownership checks at the end of each request
+    app.teardown_request(forget_surveys)
+
     # Register the API blueprint.
     app.register_blueprint(api_blueprint, url_prefix="/dhos/v1")
     app.logger.info("Registered API blueprint")
@@ -2,7 +2,7 @@ from typing import Dict, Generator, List, Optional
 
 import connexion
 import flask
-from flask import Response, jsonify
+from flask import Response, jsonify, send_file
 from flask_batteries_included.helpers.security import protected_route
 from flask_batteries_included.helpers.security.endpoint_security import (
     and_,
@@ -15,7 +15,12 @@ from dhos_questions_api.controllers import (
     question_controller,
     survey_controller,
 )
-from dhos_questions_api.helper.security import survey_by_uuid_protection
+from dhos_questions_api.helper.compression import compress_response
+from dhos_questions_api.helper.etag import conditional_json_response
+from dhos_questions_api.helper.security import (
+    survey_by_uuid_protection,
+    survey_user_protection,
+)
 
 api_blueprint = flask.Blueprint("questions", __name__)
 
@@ -164,13 +169,26 @@ def create_survey() -> Response:
         ),
     )
 )
-def create_answers() -> Response:
+def create_answers(on_conflict: str = "error") -> Response:
     """
     ---
     post:
       summary: Create answers
       description: Create a new answers using the array of objects provided in the request body.
       tags: [answer]
+      parameters:
+        - name: on_conflict
+          in: query
+          required: false
+          description: >-
+            How to handle answers identical to an existing answer. 'error' (the default) rejects
+            the request if any of the questions have already been answered. 'skip' does not store
+            identical answers and returns the existing answer marked as a duplicate instead, but
+            still rejects any other answer to a question that has already been answered.
+          schema:
+            type: string
+            enum: [error, skip]
+            default: error
       requestBody:
         description: Array of answers
         required: true
@@ -195,7 +213,9 @@ def create_answers() -> Response:
               schema: Error
     """
     answers: List[Dict] = connexion.request.get_json()
-    return jsonify(answer_controller.create_answers(answers))
+    return jsonify(
+        answer_controller.create_answers(answers, skip_duplicates=on_conflict == "skip")
+    )
 
 
 @api_blueprint.route("/survey/<survey_uuid>/answer", methods=["POST"])
@@ -208,7 +228,7 @@ def create_answers() -> Response:
         ),
     )
 )
-def create_answers_for_survey(survey_uuid: str) -> Response:
+def create_answers_for_survey(survey_uuid: str, on_conflict: str = "error") -> Response:
     """
     ---
     post:
@@ -223,6 +243,18 @@ def create_answers_for_survey(survey_uuid: str) -> Response:
           schema:
             type: string
             example: '18439f36-ffa9-42ae-90de-0beda299cd37'
+        - name: on_conflict
+          in: query
+          required: false
+          description: >-
+            How to handle answers identical to an existing answer. 'error' (the default) rejects
+            the request if any of the questions have already been answered. 'skip' does not store
+            identical answers and returns the existing answer marked as a duplicate instead, but
+            still rejects any other answer to a question that has already been answered.
+          schema:
+            type: string
+            enum: [error, skip]
+            default: error
       requestBody:
         description: Array of answers
         required: true
@@ -247,7 +279,11 @@ def create_answers_for_survey(survey_uuid: str) -> Response:
               schema: Error
     """
     answers = connexion.request.get_json()
-    return jsonify(answer_controller.create_answers_for_survey(survey_uuid, answers))
+    return jsonify(
+        answer_controller.create_answers_for_survey(
+            survey_uuid, answers, skip_duplicates=on_conflict == "skip"
+        )
+    )
 
 
 @api_blueprint.route("/question/<question_uuid>", methods=["GET"])
@@ -273,6 +309,8 @@ def get_question_by_uuid(question_uuid: str) -> Response:
           content:
             application/json:
               schema: QuestionResponse
+        '304':
+          description: Not modified, the ETag in the If-None-Match header still matches
         default:
           description: >-
             Error, e.g. 400 Bad Request, 404 Not Found, 503 Service Unavailable
@@ -280,7 +318,10 @@ def get_question_by_uuid(question_uuid: str) -> Response:
             application/json:
               schema: Error
     """
-    return jsonify(question_controller.get_question_by_uuid(question_uuid))
+    return conditional_json_response(
+        question_controller.get_question_catalog_etag("question", question_uuid),
+        lambda: question_controller.get_question_by_uuid(question_uuid),
+    )
 
 
 @api_blueprint.route("/survey/<survey_uuid>/question", methods=["GET"])
@@ -310,6 +351,8 @@ def get_questions_by_survey_uuid(survey_uuid: str) -> Response:
               schema:
                 type: array
                 items: QuestionResponse
+        '304':
+          description: Not modified, the ETag in the If-None-Match header still matches
         default:
           description: >-
             Error, e.g. 400 Bad Request, 404 Not Found, 503 Service Unavailable
@@ -317,7 +360,10 @@ def get_questions_by_survey_uuid(survey_uuid: str) -> Response:
             application/json:
               schema: Error
     """
-    return jsonify(question_controller.get_questions_by_survey_uuid(survey_uuid))
+    return conditional_json_response(
+        question_controller.get_question_catalog_etag("survey", survey_uuid),
+        lambda: question_controller.get_questions_by_survey_uuid(survey_uuid),
+    )
 
 
 @api_blueprint.route("/group/<group_uuid>/question", methods=["GET"])
@@ -347,6 +393,8 @@ def get_questions_by_group_uuid(group_uuid: str) -> Response:
               schema:
                 type: array
                 items: QuestionResponse
+        '304':
+          description: Not modified, the ETag in the If-None-Match header still matches
         default:
           description: >-
             Error, e.g. 400 Bad Request, 404 Not Found, 503 Service Unavailable
@@ -354,21 +402,105 @@ def get_questions_by_group_uuid(group_uuid: str) -> Response:
             application/json:
               schema: Error
     """
-    return jsonify(question_controller.get_questions_by_question_group_uuid(group_uuid))
+    return conditional_json_response(
+        question_controller.get_question_catalog_etag("group", group_uuid),
+        lambda: question_controller.get_questions_by_question_group_uuid(group_uuid),
+    )
 
 
 @api_blueprint.route("/survey", methods=["GET"])
-@protected_route(scopes_present(required_scopes="read:gdm_survey_all"))
-def get_all_surveys() -> Response:
+@protected_route(
+    or_(
+        scopes_present(required_scopes="read:gdm_survey_all"),
+        and_(scopes_present(required_scopes="read:gdm_survey"), survey_user_protection),
+    )
+)
+def get_all_surveys(
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    user_id: Optional[str] = None,
+    user_type: Optional[str] = None,
+    pending: bool = False,
+    fields: Optional[str] = None,
+) -> Response:
     """
     ---
     get:
       summary: Get all surveys
-      description: Get a list of all surveys.
+      description: >-
+        Get a list of all surveys, ordered by modified time. When a limit is given, the surveys
+        are returned a page at a time and the X-Next-Cursor response header holds the cursor for
+        the next page. Users without access to all surveys can get their own surveys, by giving
+        their own user_id and user_type.
       tags: [survey]
+      parameters:
+        - name: start_date
+          in: query
+          required: false
+          description: Earliest modified date of surveys
+          schema:
+            type: string
+            example: '2020-03-01'
+        - name: end_date
+          in: query
+          required: false
+          description: Latest modified date of surveys
+          schema:
+            type: string
+            example: '2020-04-01'
+        - name: limit
+          in: query
+          required: false
+          description: Maximum number of surveys to return
+          schema:
+            type: integer
+            minimum: 1
+            example: 100
+        - name: cursor
+          in: query
+          required: false
+          description: The X-Next-Cursor header from the previous page
+          schema:
+            type: string
+        - name: user_id
+          in: query
+          required: false
+          description: Only surveys for the entity with this UUID
+          schema:
+            type: string
+            example: '2c4f1d24-2952-4d4e-b1d1-3637e33cc161'
+        - name: user_type
+          in: query
+          required: false
+          description: Only surveys for entities of this type
+          schema:
+            type: string
+            example: 'patient'
+        - name: pending
+          in: query
+          required: false
+          description: Only surveys that have been neither completed nor declined
+          schema:
+            type: boolean
+            default: false
+        - name: fields
+          in: query
+          required: false
+          description: >-
+            Comma separated list of the fields to return for each survey, by default all of them
+          schema:
+            type: string
+            example: 'uuid,modified'
       responses:
         '200':
           description: An array of surveys
+          headers:
+            X-Next-Cursor:
+              description: Cursor for the next page, absent on the last page
+              schema:
+                type: string
           content:
             application/json:
               schema:
@@ -381,7 +513,20 @@ def get_all_surveys() -> Response:
             application/json:
               schema: Error
     """
-    return jsonify(survey_controller.get_surveys())
+    surveys, next_cursor = survey_controller.get_surveys(
+        start_date,
+        end_date,
+        limit=limit,
+        cursor=cursor,
+        user_id=user_id,
+        user_type=user_type,
+        pending=pending,
+        fields=fields,
+    )
+    response: Response = jsonify(surveys)
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return compress_response(response)
 
 
 @api_blueprint.route("/survey/<survey_uuid>", methods=["GET"])
@@ -414,6 +559,51 @@ def get_survey_by_uuid(survey_uuid: str) -> Response:
           content:
             application/json:
               schema: SurveyResponse
+        '304':
+          description: Not modified, the ETag in the If-None-Match header still matches
+        default:
+          description: >-
+            Error, e.g. 400 Bad Request, 404 Not Found, 503 Service Unavailable
+          content:
+            application/json:
+              schema: Error
+    """
+    return conditional_json_response(
+        survey_controller.get_survey_etag(survey_uuid),
+        lambda: survey_controller.get_survey_by_uuid(survey_uuid),
+    )
+
+
+@api_blueprint.route("/survey/search", methods=["POST"])
+@protected_route(
+    and_(
+        scopes_present(required_scopes="read:gdm_survey_all"),
+        scopes_present(required_scopes="read:gdm_answer_all"),
+    )
+)
+def search_surveys() -> Response:
+    """
+    ---
+    post:
+      summary: Get surveys by UUID
+      description: >-
+        Get the surveys with the UUIDs provided in the request body, each with its answers.
+        Unknown UUIDs are left out of the response.
+      tags: [survey]
+      requestBody:
+        description: The survey UUIDs
+        required: true
+        content:
+          application/json:
+            schema: SurveySearchRequest
+      responses:
+        '200':
+          description: The surveys with their answers
+          content:
+            application/json:
+              schema:
+                type: array
+                items: SurveyWithAnswersResponse
         default:
           description: >-
             Error, e.g. 400 Bad Request, 404 Not Found, 503 Service Unavailable
@@ -421,19 +611,77 @@ def get_survey_by_uuid(survey_uuid: str) -> Response:
             application/json:
               schema: Error
     """
-    return jsonify(survey_controller.get_survey_by_uuid(survey_uuid))
+    search: Dict = connexion.request.get_json()
+    return jsonify(survey_controller.search_surveys(search["uuids"]))
+
+
+@api_blueprint.route("/survey/<survey_uuid>/bundle", methods=["GET"])
+@protected_route(
+    and_(
+        scopes_present(required_scopes="read:gdm_question"),
+        or_(
+            and_(
+                scopes_present(required_scopes="read:gdm_survey_all"),
+                scopes_present(required_scopes="read:gdm_answer_all"),
+            ),
+            and_(
+                scopes_present(required_scopes="read:gdm_survey"),
+                scopes_present(required_scopes="read:gdm_answer"),
+                survey_by_uuid_protection,
+            ),
+        ),
+    )
+)
+def get_survey_bundle(survey_uuid: str) -> Response:
+    """
+    ---
+    get:
+      summary: Get survey bundle by UUID
+      description: >-
+        Get the survey that matches the UUID provided in the URL path, together with its
+        questions and its answers.
+      tags: [survey]
+      parameters:
+        - name: survey_uuid
+          in: path
+          required: true
+          description: The survey UUID
+          schema:
+            type: string
+            example: '18439f36-ffa9-42ae-90de-0beda299cd37'
+      responses:
+        '200':
+          description: The survey with its questions and answers
+          content:
+            application/json:
+              schema: SurveyBundleResponse
+        default:
+          description: >-
+            Error, e.g. 400 Bad Request, 404 Not Found, 503 Service Unavailable
+          content:
+            application/json:
+              schema: Error
+    """
+    return jsonify(survey_controller.get_survey_bundle(survey_uuid))
 
 
 @api_blueprint.route("/answer", methods=["GET"])
 @protected_route(scopes_present(required_scopes="read:gdm_answer_all"))
 def get_answers(
-    start_date: Optional[str] = None, end_date: Optional[str] = None
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
 ) -> Response:
     """
     ---
     get:
       summary: Get all answers
-      description: Get all answers for all surveys. Responds with an array of answer objects.
+      description: >-
+        Get all answers for all surveys, ordered by modified time. Responds with an array of
+        answer objects. When a limit is given, the answers are returned a page at a time and
+        the X-Next-Cursor response header holds the cursor for the next page.
       tags: [answer]
       parameters:
         - name: start_date
@@ -450,9 +698,106 @@ def get_answers(
           schema:
             type: string
             example: '2020-04-01'
+        - name: limit
+          in: query
+          required: false
+          description: Maximum number of answers to return
+          schema:
+            type: integer
+            minimum: 1
+            example: 100
+        - name: cursor
+          in: query
+          required: false
+          description: The X-Next-Cursor header from the previous page
+          schema:
+            type: string
+        - name: fields
+          in: query
+          required: false
+          description: >-
+            Comma separated list of the fields to return for each answer, by default all of them
+          schema:
+            type: string
+            example: 'uuid,modified'
+      responses:
+        200:
+          description: Array of answers
+          headers:
+            X-Next-Cursor:
+              description: Cursor for the next page, absent on the last page
+              schema:
+                type: string
+          content:
+            application/json:
+              schema:
+                type: array
+                items: AnswerResponse
+        default:
+          description: >-
+            Error, e.g. 400 Bad Request, 404 Not Found, 503 Service Unavailable
+          content:
+            application/json:
+              schema: Error
+    """
+    answers, next_cursor = answer_controller.get_answers(
+        start_date, end_date, limit=limit, cursor=cursor, fields=fields
+    )
+    response: Response = jsonify(answers)
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return compress_response(response)
+
+
+@api_blueprint.route("/answer_changes", methods=["GET"])
+@protected_route(scopes_present(required_scopes="read:gdm_answer_all"))
+def get_answer_changes(
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+) -> Response:
+    """
+    ---
+    get:
+      summary: Get answer changes
+      description: >-
+        Get the answers created, updated or deleted since the position given by the cursor,
+        ordered by modified time, a page at a time. Deleted answers include the time they were
+        deleted. The X-Next-Cursor response header holds the cursor to use next, and is given
+        even after the last page so that later changes can be fetched with it. Answers modified
+        in the last few seconds are left out until they have settled.
+      tags: [answer]
+      parameters:
+        - name: limit
+          in: query
+          required: false
+          description: Maximum number of answers to return, by default the largest page size
+          schema:
+            type: integer
+            minimum: 1
+            example: 100
+        - name: cursor
+          in: query
+          required: false
+          description: The X-Next-Cursor header from the previous request, or none to start from the beginning
+          schema:
+            type: string
+        - name: fields
+          in: query
+          required: false
+          description: >-
+            Comma separated list of the fields to return for each answer, by default all of them
+          schema:
+            type: string
+            example: 'uuid,modified'
       responses:
         200:
           description: Array of answers
+          headers:
+            X-Next-Cursor:
+              description: Cursor for the changes after these, absent if there have been no changes
+              schema:
+                type: string
           content:
             application/json:
               schema:
@@ -465,7 +810,13 @@ def get_answers(
             application/json:
               schema: Error
     """
-    return jsonify(answer_controller.get_answers(start_date, end_date))
+    answers, next_cursor = answer_controller.get_answer_changes(
+        limit=limit, cursor=cursor, fields=fields
+    )
+    response: Response = jsonify(answers)
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return compress_response(response)
 
 
 @api_blueprint.route("/survey/<survey_uuid>/answer", methods=["GET"])
@@ -477,7 +828,9 @@ def get_answers(
         ),
     )
 )
-def get_answers_by_survey_uuid(survey_uuid: str) -> Response:
+def get_answers_by_survey_uuid(
+    survey_uuid: str, fields: Optional[str] = None
+) -> Response:
     """
     ---
     get:
@@ -492,6 +845,14 @@ def get_answers_by_survey_uuid(survey_uuid: str) -> Response:
           schema:
             type: string
             example: 'be4db181-076d-40f8-87c4-303761990563'
+        - name: fields
+          in: query
+          required: false
+          description: >-
+            Comma separated list of the fields to return for each answer, by default all of them
+          schema:
+            type: string
+            example: 'uuid,modified'
       responses:
         200:
           description: Array of answers
@@ -507,7 +868,9 @@ def get_answers_by_survey_uuid(survey_uuid: str) -> Response:
             application/json:
               schema: Error
     """
-    return jsonify(answer_controller.get_answers_by_survey_uuid(survey_uuid))
+    return jsonify(
+        answer_controller.get_answers_by_survey_uuid(survey_uuid, fields=fields)
+    )
 
 
 @api_blueprint.route(
@@ -702,7 +1065,10 @@ def update_answer(answer_uuid: str) -> Response:
     )
 )
 def get_survey_responses(
-    start_date: Optional[str] = None, end_date: Optional[str] = None
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    format: str = "csv",
+    layout: str = "long",
 ) -> Response:
     """
     ---
@@ -711,6 +1077,11 @@ def get_survey_responses(
       description: >-
         Generates and returns a CSV of survey questions and answers between two dates. The dates are
         inclusive - if an end_date is specified then any survey answers recorded on that day will be included.
+        The answers can be returned as a Parquet file instead, if the server supports it. With the
+        wide layout, the CSV has one row per survey and one column per question instead of one row
+        per answer. Columns are named by question text followed by the question UUID in brackets,
+        and multiple answers to a question are separated by semicolons, with any semicolons or
+        backslashes within an answer escaped by a backslash.
       tags: [survey]
       parameters:
         - name: start_date
@@ -729,13 +1100,38 @@ def get_survey_responses(
             type: string
             format: date
             example: '2020-04-01'
+        - name: format
+          in: query
+          required: false
+          description: Format of the file, csv or parquet
+          schema:
+            type: string
+            enum: [csv, parquet]
+            default: csv
+        - name: layout
+          in: query
+          required: false
+          description: One row per answer (long) or one row per survey (wide, CSV only)
+          schema:
+            type: string
+            enum: [long, wide]
+            default: long
       responses:
         '200':
-          description: CSV of survey answers
+          description: CSV (or Parquet file) of survey answers
           content:
             text/csv:
               schema:
                 type: string
+            application/vnd.apache.parquet:
+              schema:
+                type: string
+                format: binary
+        '501':
+          description: Parquet export is not available on this server
+          content:
+            application/json:
+              schema: Error
         default:
           description: >-
             Error, e.g. 400 Bad Request, 404 Not Found, 503 Service Unavailable
@@ -743,9 +1139,187 @@ def get_survey_responses(
             application/json:
               schema: Error
     """
-    iter_csv: Generator[str, None, None] = survey_controller.get_survey_responses(
-        start_date, end_date
+    export: Generator[bytes, None, None] = survey_controller.get_survey_responses(
+        start_date, end_date, export_format=format, layout=layout
     )
-    response = Response(iter_csv, mimetype="text/csv")
+    # Pass the export straight to the server, otherwise the whole export is read into
+    # memory to compute an ETag before the first byte is sent.
+    if format == "parquet":
+        # Parquet files are already compressed.
+        response = Response(export, mimetype="application/vnd.apache.parquet")
+        response.headers["Content-Disposition"] = "attachment; filename=data.parquet"
+        response.direct_passthrough = True
+        return response
+
+    response = Response(export, mimetype="text/csv")
     response.headers["Content-Disposition"] = "attachment; filename=data.csv"
+    response.direct_passthrough = True
+    return compress_response(response)
+
+
+@api_blueprint.route("/survey_responses/job", methods=["POST"])
+@protected_route(
+    and_(
+        scopes_present(required_scopes="read:gdm_survey_all"),
+        scopes_present(required_scopes="read:gdm_question"),
+        scopes_present(required_scopes="read:gdm_answer_all"),
+    )
+)
+def create_survey_responses_job() -> Response:
+    """
+    ---
+    post:
+      summary: Create survey responses export job
+      description: >-
+        Starts exporting survey questions and answers between two dates in the background, with
+        the same options as /dhos/v1/survey_responses. If the same export has already been made
+        and no answers or questions have changed since, the existing job is returned instead.
+        Poll the job until it is complete, then download the file.
+      tags: [survey]
+      requestBody:
+        description: Export details
+        required: true
+        content:
+          application/json:
+            schema: SurveyResponsesJobRequest
+      responses:
+        '202':
+          description: The export job
+          content:
+            application/json:
+              schema: SurveyResponsesJobResponse
+        '501':
+          description: Parquet export is not available on this server
+          content:
+            application/json:
+              schema: Error
+        default:
+          description: >-
+            Error, e.g. 400 Bad Request, 404 Not Found, 503 Service Unavailable
+          content:
+            application/json:
+              schema: Error
+    """
+    job_details: Dict = connexion.request.get_json()
+    job: Dict = survey_controller.create_survey_responses_job(
+        start_date=job_details.get("start_date"),
+        end_date=job_details.get("end_date"),
+        export_format=job_details.get("format", "csv"),
+        layout=job_details.get("layout", "long"),
+    )
+    response: Response = jsonify(job)
+    response.status_code = 202
+    response.headers["Location"] = flask.url_for(
+        "questions.get_survey_responses_job", job_id=job["job_id"]
+    )
     return response
+
+
+@api_blueprint.route("/survey_responses/job/<job_id>", methods=["GET"])
+@protected_route(
+    and_(
+        scopes_present(required_scopes="read:gdm_survey_all"),
+        scopes_present(required_scopes="read:gdm_question"),
+        scopes_present(required_scopes="read:gdm_answer_all"),
+    )
+)
+def get_survey_responses_job(job_id: str) -> Response:
+    """
+    ---
+    get:
+      summary: Get survey responses export job
+      description: Get the status of a survey responses export job.
+      tags: [survey]
+      parameters:
+        - name: job_id
+          in: path
+          required: true
+          description: The export job identifier
+          schema:
+            type: string
+            pattern: '^[0-9a-f]{64}$'
+            example: '9f86d081884c7d659a2feaa0c55ad015a3bf4f1b2b0b822cd15d6c15b0f00a08'
+      responses:
+        '200':
+          description: The export job
+          content:
+            application/json:
+              schema: SurveyResponsesJobResponse
+        default:
+          description: >-
+            Error, e.g. 400 Bad Request, 404 Not Found, 503 Service Unavailable
+          content:
+            application/json:
+              schema: Error
+    """
+    return jsonify(survey_controller.get_survey_responses_job(job_id))
+
+
+@api_blueprint.route("/survey_responses/job/<job_id>/download", methods=["GET"])
+@protected_route(
+    and_(
+        scopes_present(required_scopes="read:gdm_survey_all"),
+        scopes_present(required_scopes="read:gdm_question"),
+        scopes_present(required_scopes="read:gdm_answer_all"),
+    )
+)
+def download_survey_responses_job(job_id: str) -> Response:
+    """
+    ---
+    get:
+      summary: Download survey responses export
+      description: >-
+        Downloads the file written by a complete survey responses export job. Range requests are
+        supported, so an interrupted download can be resumed.
+      tags: [survey]
+      parameters:
+        - name: job_id
+          in: path
+          required: true
+          description: The export job identifier
+          schema:
+            type: string
+            pattern: '^[0-9a-f]{64}$'
+            example: '9f86d081884c7d659a2feaa0c55ad015a3bf4f1b2b0b822cd15d6c15b0f00a08'
+      responses:
+        '200':
+          description: CSV (or Parquet file) of survey answers
+          content:
+            text/csv:
+              schema:
+                type: string
+            application/vnd.apache.parquet:
+              schema:
+                type: string
+                format: binary
+        '206':
+          description: The requested range of the file
+        '304':
+          description: Not modified, the ETag in the If-None-Match header still matches
+        '409':
+          description: The export job is still running or has failed
+          content:
+            application/json:
+              schema: Error
+        default:
+          description: >-
+            Error, e.g. 400 Bad Request, 404 Not Found, 503 Service Unavailable
+          content:
+            application/json:
+              schema: Error
+    """
+    path, export_format = survey_controller.get_survey_responses_job_file(job_id)
+    # The job id changes whenever the export would, so it is used as the ETag. The
+    # file is not compressed, so that byte ranges refer to the file itself.
+    return send_file(
+        path,
+        mimetype=(
+            "application/vnd.apache.parquet"
+            if export_format == "parquet"
+            else "text/csv"
+        ),
+        as_attachment=True,
+        download_name=f"data.{export_format}",
+        conditional=True,
+        etag=job_id,
+    )
@@ -2,7 +2,10 @@ from typing import Dict, List
 
 from flask_batteries_included.sqldb import db
 
+from dhos_questions_api.helper.question_catalog import get_question_catalog
+from dhos_questions_api.helper.question_validator import clear_validators
 from dhos_questions_api.models.question import Question
+from dhos_questions_api.queries.question import query_questions_with_details
 
 
 def reset_database() -> None:
@@ -17,8 +20,10 @@ def reset_database() -> None:
     session.execute("TRUNCATE TABLE answer cascade")
     session.commit()
     session.close()
+    clear_validators()
+    get_question_catalog().clear()
 
 
 def get_questions() -> List[Dict]:
-    questions: List[Question] = Question.query.all()
+    questions: List[Question] = query_questions_with_details().all()
     return [question.to_dict() for question in questions]
@@ -0,0 +1,55 @@
+import os
+import tempfile
+
+from environs import Env
+
+env = Env()
+
+
+class Configuration:
+    # How often (in seconds) the question catalog cache checks whether the
+    # questions, question types, option types or groups have changed
+    QUESTION_CATALOG_CHECK_SECONDS: int = env.int(
+        "QUESTION_CATALOG_CHECK_SECONDS", default=30
+    )
+    # Maximum number of entries held by the question catalog cache
+    QUESTION_CATALOG_CACHE_SIZE: int = env.int(
+        "QUESTION_CATALOG_CACHE_SIZE", default=1000
+    )
+    # How long (in seconds) entries are kept in caches shared between instances
+    # of the service, when Redis is installed
+    CACHE_TTL_SECONDS: int = env.int("CACHE_TTL_SECONDS", default=3600)
+    # Largest page that can be requested from paginated endpoints
+    MAX_PAGE_SIZE: int = env.int("MAX_PAGE_SIZE", default=1000)
+    # Largest number of surveys that can be requested at once by UUID
+    MAX_SURVEY_BATCH_SIZE: int = env.int("MAX_SURVEY_BATCH_SIZE", default=100)
+    # Number of rows fetched from the database at a time when streaming exports
+    EXPORT_FETCH_SIZE: int = env.int("EXPORT_FETCH_SIZE", default=1000)
+    # Approximate size (in characters) of the chunks that CSV exports are written in
+    EXPORT_CHUNK_SIZE: int = env.int("EXPORT_CHUNK_SIZE", default=65536)
+    # Number of rows in each row group of Parquet exports
+    EXPORT_ROW_GROUP_SIZE: int = env.int("EXPORT_ROW_GROUP_SIZE", default=100000)
+    # Number of days of answers in each shard of the survey responses CSV
+    EXPORT_SHARD_DAYS: int = env.int("EXPORT_SHARD_DAYS", default=30)
+    # Number of shards of survey responses CSVs exported at the same time, across
+    # all exports, and the size of the database connection pool kept for them
+    # (PostgreSQL only)
+    EXPORT_SHARD_WORKERS: int = env.int("EXPORT_SHARD_WORKERS", default=4)
+    # Directory that the files written by survey responses export jobs are kept in,
+    # which must be shared by every instance of the service
+    EXPORT_JOB_DIR: str = env.str(
+        "EXPORT_JOB_DIR",
+        default=os.path.join(tempfile.gettempdir(), "dhos-questions-api-exports"),
+    )
+    # Number of survey responses export jobs that can run at the same time
+    EXPORT_JOB_WORKERS: int = env.int("EXPORT_JOB_WORKERS", default=2)
+    # How long (in seconds) the files written by export jobs are kept
+    EXPORT_JOB_MAX_AGE_SECONDS: int = env.int(
+        "EXPORT_JOB_MAX_AGE_SECONDS", default=86400
+    )
+    # How long (in seconds) an export job can go without any sign of progress before
+    # it is taken to have been interrupted
+    EXPORT_JOB_STALE_SECONDS: int = env.int("EXPORT_JOB_STALE_SECONDS", default=60)
+    # Answers modified less than this many seconds ago are left out of the answer
+    # change feed, so that answers still being saved are not skipped over
+    CHANGE_FEED_DELAY_SECONDS: int = env.int("CHANGE_FEED_DELAY_SECONDS", default=5)
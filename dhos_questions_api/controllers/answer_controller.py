@@ -1,82 +1,69 @@
-from datetime import datetime
-from typing import Dict, List, Optional
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Set, Tuple
 
+from flask import abort, current_app
+from flask_batteries_included.helpers.security.jwt import current_jwt_user
 from flask_batteries_included.helpers.timestamp import (
     parse_datetime_to_iso8601,
     split_timestamp,
 )
 from flask_batteries_included.sqldb import db, generate_uuid
 from she_logging import logger
-
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import joinedload
+
+from dhos_questions_api.helper.fields import parse_fields
+from dhos_questions_api.helper.pagination import (
+    check_page_size,
+    encode_cursor,
+    paginate,
+)
+from dhos_questions_api.helper.question_validator import (
+    QuestionValidator,
+    get_validators,
+)
+from dhos_questions_api.helper.security import load_surveys
 from dhos_questions_api.models.answer import Answer
 from dhos_questions_api.models.question import Question
 from dhos_questions_api.models.survey import Survey
+from dhos_questions_api.queries.answer import (
+    query_answer_changes,
+    query_answers,
+    query_answers_by_survey_uuid,
+)
 from dhos_questions_api.queries.softdelete import QueryWithSoftDelete
 
 
-def create_answers(answers: List[Dict]) -> List[Dict]:
-    db_answers = []
-    answer_batch: Dict = {}
-
-    for answer in answers:
-        if not validate_answer(answer):
-            raise KeyError("Answer failed validation")
-        if not answer["question_id"] in answer_batch:
-            answer_batch[answer["question_id"]] = []
-        answer_batch[answer["question_id"]].append(answer)
-
-    for question_uuid in answer_batch:
-        if not validate_answer_batch(question_uuid, answer_batch[question_uuid]):
-            raise KeyError("Answers failed batch validation")
-
-    for answer in answers:
-        new_answer = Answer(
-            uuid=generate_uuid(),
-            survey_id=answer["survey_id"],
-            question_id=answer["question_id"],
-            value=answer["value"],
-        )
-        if "text" in answer:
-            new_answer.text = answer["text"]
-
-        db.session.add(new_answer)
-        db_answers.append(new_answer)
+def create_answers(answers: List[Dict], skip_duplicates: bool = False) -> List[Dict]:
+    validate_answers(answers, skip_duplicates=skip_duplicates)
 
+    survey_answers = [(answer["survey_id"], answer) for answer in answers]
+    if skip_duplicates:
+        created = insert_answers_skipping_duplicates(survey_answers)
+    else:
+        created = insert_answers(survey_answers)
     db.session.commit()
-    return [answer.to_dict() for answer in db_answers]
-
+    return created
 
-def create_answers_for_survey(survey_id: str, answers: List[Dict]) -> List[Dict]:
-    db_answers = []
-    answer_batch: Dict = {}
-
-    for answer in answers:
-        if not validate_answer(answer, survey_id):
-            raise KeyError("Answer failed validation")
-        if not answer["question_id"] in answer_batch:
-            answer_batch[answer["question_id"]] = []
-        answer_batch[answer["question_id"]].append(answer)
-
-    for question_id in answer_batch:
-        if not validate_answer_batch(question_id, answer_batch[question_id]):
-            raise KeyError("Answers failed batch validation")
 
-    for answer in answers:
-        new_answer = Answer(
-            uuid=generate_uuid(),
-            survey_id=survey_id,
-            question_id=answer["question_id"],
-            value=answer["value"],
-        )
-        if "text" in answer:
-            new_answer.text = answer["text"]
+def create_answers_for_survey(
+    survey_id: str, answers: List[Dict], skip_duplicates: bool = False
+) -> List[Dict]:
+    surveys: Dict[str, Survey] = validate_answers(
+        answers, survey_id, skip_duplicates=skip_duplicates
+    )
 
-        db.session.add(new_answer)
-        db_answers.append(new_answer)
+    survey_answers = [(survey_id, answer) for answer in answers]
+    if skip_duplicates:
+        created = insert_answers_skipping_duplicates(survey_answers)
+    else:
+        created = insert_answers(survey_answers)
 
     # Update the survey completion date to the most recent
     # submitted batch of answers
-    survey = Survey.query.filter_by(uuid=survey_id).first()
+    survey = surveys.get(survey_id)
+    if survey is None:
+        survey = Survey.query.filter_by(uuid=survey_id).first()
     now_iso8601 = parse_datetime_to_iso8601(datetime.utcnow())
     if now_iso8601 is None:
         raise ValueError("Couldn't generate timestamp")
@@ -85,25 +72,160 @@ def create_answers_for_survey(survey_id: str, answers: List[Dict]) -> List[Dict]
     survey.completed_tz = tz
 
     db.session.commit()
-    return [answer.to_dict() for answer in db_answers]
+    return created
 
 
-def get_answers(
-    start_date: Optional[str] = None, end_date: Optional[str] = None
+def insert_answers(survey_answers: List[Tuple[str, Dict]]) -> List[Dict]:
+    """
+    Inserts a batch of (survey UUID, answer) pairs with a single executemany INSERT
+    rather than through the ORM unit of work. All column values, including the
+    identifiers and audit timestamps, are generated here, so the response is built
+    from the inserted rows and no refresh is needed after the commit.
+    """
+    if not survey_answers:
+        return []
+
+    rows: List[Dict] = _answer_rows(survey_answers)
+    db.session.execute(Answer.__table__.insert(), rows)
+
+    # Transient instances are only used to share the serialisation in to_dict().
+    return [Answer(**row).to_dict() for row in rows]
+
+
+def insert_answers_skipping_duplicates(
+    survey_answers: List[Tuple[str, Dict]],
 ) -> List[Dict]:
-    q: QueryWithSoftDelete = Answer.query
-    if start_date:
-        q = q.filter(Answer.modified >= start_date)
-    if end_date:
-        q = q.filter(Answer.modified <= end_date)
+    """
+    Inserts a batch of answers, leaving out any that are identical to an existing
+    active answer according to the only_one_active_identical_question_option index
+    (INSERT ... ON CONFLICT DO NOTHING). Duplicates are returned as the existing
+    answer with "duplicate" set, in the same position as the submitted answer.
+    """
+    if not survey_answers:
+        return []
+
+    rows: List[Dict] = _answer_rows(survey_answers)
+    table = Answer.__table__
+    conflict_args: Dict = {
+        "index_elements": ["survey_id", "question_id", "value"],
+        "index_where": table.c.deleted.is_(None),
+    }
+    inserted_uuids: Set[str]
+    if db.engine.dialect.name == "postgresql":
+        statement = (
+            postgresql.insert(table)
+            .values(rows)
+            .on_conflict_do_nothing(**conflict_args)
+            .returning(table.c.uuid)
+        )
+        inserted_uuids = {row.uuid for row in db.session.execute(statement)}
+    else:
+        # SQLite has no RETURNING support in SQLAlchemy 1.4, so insert row by row
+        # and use the row count to spot the conflicts.
+        statement = sqlite.insert(table).on_conflict_do_nothing(**conflict_args)
+        inserted_uuids = {
+            row["uuid"] for row in rows if db.session.execute(statement, row).rowcount
+        }
+
+    duplicate_rows = [row for row in rows if row["uuid"] not in inserted_uuids]
+    existing: Dict[Tuple[str, str, str], Answer] = {}
+    if duplicate_rows:
+        logger.info("Skipped %d duplicate answers", len(duplicate_rows))
+        for answer in Answer.query.filter(
+            Answer.survey_id.in_({row["survey_id"] for row in duplicate_rows}),
+            Answer.question_id.in_({row["question_id"] for row in duplicate_rows}),
+        ):
+            existing[(answer.survey_id, answer.question_id, answer.value)] = answer
+
+    results: List[Dict] = []
+    for row in rows:
+        if row["uuid"] in inserted_uuids:
+            results.append(Answer(**row).to_dict())
+            continue
+        duplicate = existing.get((row["survey_id"], row["question_id"], row["value"]))
+        if duplicate is None:
+            # The conflicting answer was deleted or changed since the insert.
+            logger.info(
+                "Existing answer to question %s in survey %s not found",
+                row["question_id"],
+                row["survey_id"],
+            )
+            abort(409)
+        results.append({**duplicate.to_dict(), "duplicate": True})
+    return results
+
+
+def _answer_rows(survey_answers: List[Tuple[str, Dict]]) -> List[Dict]:
+    now: datetime = datetime.utcnow()
+    user: str = current_jwt_user()
+    return [
+        {
+            "uuid": generate_uuid(),
+            "created": now,
+            "created_by_": user,
+            "modified": now,
+            "modified_by_": user,
+            "survey_id": survey_id,
+            "question_id": answer["question_id"],
+            "value": answer["value"],
+            "text": answer.get("text"),
+            "deleted": None,
+        }
+        for survey_id, answer in survey_answers
+    ]
 
-    answers: List[Answer] = q.all()
-    return [answer.to_dict() for answer in answers]
 
+def get_answers(
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+) -> Tuple[List[Dict], Optional[str]]:
+    check_page_size(limit)
+    answer_fields: Optional[Set[str]] = parse_fields(fields, Answer)
+    q: QueryWithSoftDelete = query_answers(start_date, end_date, answer_fields)
+    answers, next_cursor = paginate(q, Answer, limit=limit, cursor=cursor)
+    return [answer.to_dict(answer_fields) for answer in answers], next_cursor
+
+
+def get_answer_changes(
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+) -> Tuple[List[Dict], Optional[str]]:
+    """
+    Gets the answers changed since the position given by the cursor, including
+    deleted answers. Unlike the other paginated endpoints, a cursor is returned
+    even after the last page, so that consumers can come back later for the
+    answers changed since.
+    """
+    check_page_size(limit)
+    answer_fields: Optional[Set[str]] = parse_fields(fields, Answer)
+    # Answers are saved with a modified time from the instance saving them, so an
+    # answer can be committed after others with later modified times. Leaving out
+    # the most recent answers stops the feed moving past one before it is visible.
+    settled: datetime = datetime.now(tz=timezone.utc) - timedelta(
+        seconds=current_app.config["CHANGE_FEED_DELAY_SECONDS"]
+    )
+    q = query_answer_changes(settled, answer_fields)
+    answers, _ = paginate(
+        q,
+        Answer,
+        limit=limit or current_app.config["MAX_PAGE_SIZE"],
+        cursor=cursor,
+    )
+    if answers:
+        cursor = encode_cursor(answers[-1].modified, answers[-1].uuid)
+    return [answer.to_dict(answer_fields) for answer in answers], cursor
 
-def get_answers_by_survey_uuid(survey_uuid: str) -> List[Dict]:
-    q = Answer.query.filter(Answer.survey_id == survey_uuid)
-    return [answer.to_dict() for answer in q]
+
+def get_answers_by_survey_uuid(
+    survey_uuid: str, fields: Optional[str] = None
+) -> List[Dict]:
+    answer_fields: Optional[Set[str]] = parse_fields(fields, Answer)
+    q = query_answers_by_survey_uuid(survey_uuid, answer_fields)
+    return [answer.to_dict(answer_fields) for answer in q]
 
 
 def get_answers_by_survey_and_question_uuid(
@@ -137,140 +259,86 @@ def update_answer(answer_uuid: str, answer: Dict) -> Dict:
     return answer_db.to_dict()
 
 
-def is_int(input_string: str) -> bool:
-    try:
-        int(input_string)
-    except ValueError:
-        logger.info("Could not parse integer '%s'", input_string)
-        return False
-    return True
-
-
-def validate_answer(answer: Dict, survey_uuid: str = None) -> bool:
-    if not survey_uuid:
-        survey_uuid = answer.get("survey_id")
-
-    if survey_uuid is None:
-        raise ValueError("No survey ID provided")
-
-    survey: Optional[Survey] = Survey.query.filter_by(uuid=survey_uuid).first()
-    if not survey:
-        logger.info("Could not find survey with UUID %s", survey_uuid)
-        return False
-
-    question: Optional[Question] = Question.query.filter_by(
-        uuid=answer["question_id"]
-    ).first()
-    if question is None:
-        logger.error("Could not find question with UUID %s", answer["question_id"])
-        return False
-
-    if is_question_already_answered(answer["question_id"], survey_uuid):
-        logger.info(
-            "Question %s in survey %s already answered",
-            answer["question_id"],
-            survey_uuid,
+def validate_answers(
+    answers: List[Dict],
+    survey_uuid: Optional[str] = None,
+    skip_duplicates: bool = False,
+) -> Dict[str, Survey]:
+    """
+    Validates a batch of answers. The referenced surveys, questions and any existing
+    answers are loaded up front in a fixed number of queries, and the checks are then
+    made in memory using the cached validators for the questions. Returns the
+    referenced surveys keyed by UUID so that callers don't need to load them again.
+
+    With skip_duplicates, answers identical to an existing answer are let through to
+    be skipped when inserted. Any other answer to a question that has already been
+    answered is still rejected, whatever the type of question.
+    """
+    if not answers:
+        return {}
+
+    survey_uuids: Set[str] = set()
+    for answer in answers:
+        answer_survey_uuid = survey_uuid or answer.get("survey_id")
+        if answer_survey_uuid is None:
+            raise ValueError("No survey ID provided")
+        survey_uuids.add(answer_survey_uuid)
+    question_uuids: Set[str] = {answer["question_id"] for answer in answers}
+
+    # Usually already loaded by the ownership check on the request.
+    surveys: Dict[str, Survey] = load_surveys(survey_uuids)
+    questions: Dict[str, Question] = {
+        question.uuid: question
+        for question in Question.query.options(
+            joinedload(Question.question_type)
+        ).filter(Question.uuid.in_(question_uuids))
+    }
+    existing_answers: Set[Tuple[str, str, str]] = set(
+        Answer.query.with_entities(
+            Answer.survey_id, Answer.question_id, Answer.value
+        ).filter(
+            Answer.survey_id.in_(survey_uuids),
+            Answer.question_id.in_(question_uuids),
         )
-        return False
-
-    return True
+    )
+    already_answered: Set[Tuple[str, str]] = {
+        (survey_id, question_id) for survey_id, question_id, _ in existing_answers
+    }
 
+    answer_batch: Dict[str, List[Dict]] = {}
+    for answer in answers:
+        answer_survey_uuid = survey_uuid or answer["survey_id"]
+        if answer_survey_uuid not in surveys:
+            logger.info("Could not find survey with UUID %s", answer_survey_uuid)
+            raise KeyError("Answer failed validation")
 
-def validate_answer_batch(question_uuid: str, answers: List[Dict]) -> bool:
-    question = Question.query.filter_by(uuid=question_uuid).first()
+        if answer["question_id"] not in questions:
+            logger.error("Could not find question with UUID %s", answer["question_id"])
+            raise KeyError("Answer failed validation")
 
-    if question.question_type.value in (0, 1, 3, 4, 5):
-        if len(answers) > 1:
+        answered: bool = (answer_survey_uuid, answer["question_id"]) in already_answered
+        if answered and skip_duplicates:
+            # Identical answers are skipped when inserted.
+            answered = (
+                answer_survey_uuid,
+                answer["question_id"],
+                answer["value"],
+            ) not in existing_answers
+        if answered:
             logger.info(
-                "%d answers sent for question %s when only 1 was expected",
-                len(answers),
-                question_uuid,
+                "Question %s in survey %s already answered",
+                answer["question_id"],
+                answer_survey_uuid,
             )
-            return False
-
-    if question.question_type.value == 0:
-        return True
-
-    if question.question_type.value == 1:
-        return is_int(answers[0]["value"])
-
-    if question.question_type.value == 3:
-        return is_answer_from_available_options(question, answers[0])
-
-    if question.question_type.value == 5:
-        return is_answer_in_question_range(question, answers[0])
-
-    if question.question_type.value in [2, 6]:
-        return are_all_answers_from_available_options(question, answers)
-
-    return True
-
-
-def is_question_already_answered(question_uuid: str, survey_uuid: str) -> bool:
-    a = Answer.query.filter_by(question_id=question_uuid, survey_id=survey_uuid).first()
-    if a is None:
-        return False
-    return True
-
-
-def is_answer_from_available_options(question: Question, answer: Dict) -> bool:
-
-    for option in question.question_options:
-        if option.value == answer["value"]:
-            return True
-    logger.info("Answer value %s is not in the available options", answer["value"])
-    return False
-
-
-def is_answer_in_question_range(question: Question, answer: Dict) -> bool:
-    for option in question.question_options:
-        if option.question_option_type.value == 2:
-            min_val = float(option.value)
-        if option.question_option_type.value == 3:
-            max_val = float(option.value)
-        if option.question_option_type.value == 4:
-            interval = float(option.value)
+            raise KeyError("Answer failed validation")
 
-        value = float(answer["value"])
+        answer_batch.setdefault(answer["question_id"], []).append(answer)
 
-    if value >= min_val and value <= max_val:
-        if (value - min_val) % interval == 0:
-            logger.info(
-                "Answer is within value range, but has failed the interval check"
-            )
-            return True
-
-    logger.info(
-        "Answer not in acceptable range",
-        extra={
-            "answer_value": value,
-            "answer_min": min_val,
-            "answer_max": max_val,
-            "answer_interval": interval,
-        },
+    validators: Dict[str, QuestionValidator] = get_validators(
+        questions[question_uuid] for question_uuid in answer_batch
     )
-    return False
-
-
-def are_all_answers_from_available_options(
-    question: Question, answers: List[Dict]
-) -> bool:
-    if are_any_options_values_duplicated(answers=answers):
-        return False
-
-    for answer in answers:
-        if not is_answer_from_available_options(question, answer):
-            return False
-
-    return True
-
-
-def are_any_options_values_duplicated(answers: List[Dict]) -> bool:
-    option_values: List = []
-    for answer in answers:
-        if answer["value"] in option_values:
-            return True
-
-        option_values.append(answer["value"])
+    for question_uuid in answer_batch:
+        if not validators[question_uuid].validate(answer_batch[question_uuid]):
+            raise KeyError("Answers failed batch validation")
 
-    return False
+    return surveys
@@ -2,12 +2,18 @@ from typing import Dict, List
 
 from flask_batteries_included.sqldb import db, generate_uuid
 
+from dhos_questions_api.helper.etag import make_etag
+from dhos_questions_api.helper.question_catalog import get_question_catalog
 from dhos_questions_api.models.group import Group
 from dhos_questions_api.models.question import Question
 from dhos_questions_api.models.question_option import QuestionOption
 from dhos_questions_api.models.question_option_type import QuestionOptionType
 from dhos_questions_api.models.question_type import QuestionType
 from dhos_questions_api.models.survey import Survey
+from dhos_questions_api.queries.question import (
+    query_questions_by_group_uuid,
+    query_questions_with_details,
+)
 
 
 def create_question(question_details: Dict) -> Dict:
@@ -74,6 +80,7 @@ def create_question_from_dict(question: Dict) -> Dict:
 
     db.session.add(insert)
     db.session.commit()
+    get_question_catalog().invalidate()
 
     return insert.to_dict()
 
@@ -94,6 +101,7 @@ def create_question_type_from_dict(question_type: Dict) -> Dict:
 
     db.session.add(insert)
     db.session.commit()
+    get_question_catalog().invalidate()
 
     return insert.to_dict()
 
@@ -122,22 +130,45 @@ def create_question_option_type_from_dict(question_option_type: Dict) -> Dict:
 
     db.session.add(insert)
     db.session.commit()
+    get_question_catalog().invalidate()
 
     return insert.to_dict()
 
 
+def get_question_catalog_etag(*key: str) -> str:
+    # Every question response is derived from the catalog tables alone, so the
+    # catalog version identifies the response without loading it.
+    return make_etag(get_question_catalog().version(), *key)
+
+
 def get_question_by_uuid(question_uuid: str) -> Dict:
-    return Question.query.filter_by(uuid=question_uuid).first_or_404().to_dict()
+    return get_question_catalog().get(
+        ("question", question_uuid),
+        lambda: query_questions_with_details()
+        .filter_by(uuid=question_uuid)
+        .first_or_404()
+        .to_dict(),
+    )
 
 
 def get_questions_by_survey_uuid(survey_uuid: str) -> List[Dict]:
-    survey = Survey.query.filter_by(uuid=survey_uuid).first_or_404()
-    return get_questions_by_question_group_uuid(survey.group.uuid)
+    group_uuid: str = get_question_catalog().get_survey_group(
+        survey_uuid,
+        lambda: Survey.query.filter_by(uuid=survey_uuid).first_or_404().group_id,
+    )
+    return get_questions_by_question_group_uuid(group_uuid)
 
 
 def get_questions_by_question_group_uuid(group_uuid: str) -> List[Dict]:
-    q = Question.query.filter(Question.groups.any(Group.uuid == group_uuid))
-    return [question.to_dict() for question in q]
+    return get_question_catalog().get(
+        ("group", group_uuid), lambda: _load_questions_by_group_uuid(group_uuid)
+    )
+
+
+def _load_questions_by_group_uuid(group_uuid: str) -> List[Dict]:
+    return [
+        question.to_dict() for question in query_questions_by_group_uuid(group_uuid)
+    ]
 
 
 def create_question_type(question_type_details: Dict) -> Dict:
@@ -1,25 +1,44 @@
-import csv
 from datetime import date, datetime, timedelta, timezone
-from io import StringIO
-from typing import Dict, Generator, List, Optional, Tuple
+from typing import Dict, Generator, List, Optional, Set, Tuple
 
-from flask_batteries_included.helpers.request_arg import RequestArg
+from flask import abort, current_app
 from flask_batteries_included.helpers.timestamp import (
     parse_iso8601_to_date_typesafe,
     split_timestamp,
 )
 from flask_batteries_included.sqldb import db, generate_uuid
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload
 from sqlalchemy.sql import join, select
 
+from dhos_questions_api.controllers import question_controller
+from dhos_questions_api.helper.etag import make_etag
+from dhos_questions_api.helper.export import (
+    export_csv_shards,
+    export_parquet,
+    export_wide_csv,
+    get_shard_exporter,
+)
+from dhos_questions_api.helper.export_jobs import (
+    STATUS_COMPLETE,
+    STATUS_FAILED,
+    get_export_jobs,
+)
+from dhos_questions_api.helper.fields import parse_fields
+from dhos_questions_api.helper.pagination import check_page_size, paginate
+from dhos_questions_api.helper.question_catalog import get_question_catalog
+from dhos_questions_api.helper.security import load_surveys
 from dhos_questions_api.models.answer import Answer
 from dhos_questions_api.models.group import Group
 from dhos_questions_api.models.question import Question
 from dhos_questions_api.models.survey import Survey
+from dhos_questions_api.queries.group import query_group_by_name
 from dhos_questions_api.queries.softdelete import QueryWithSoftDelete
+from dhos_questions_api.queries.survey import query_surveys
 
 
 def create_survey(survey_details: Dict) -> Dict:
-    group: Group = Group.query.filter_by(group=survey_details["group"]).first()
+    group: Group = query_group_by_name(survey_details["group"]).first()
     if group is None:
         raise KeyError(f"Question group {survey_details['group']} not found.")
 
@@ -34,23 +53,87 @@ def create_survey(survey_details: Dict) -> Dict:
     return new_survey.to_dict()
 
 
-def get_surveys() -> List[Dict]:
-    start_date: str = RequestArg.string("start_date", default=None)
-    end_date: str = RequestArg.string("end_date", default=None)
+def get_surveys(
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    user_id: Optional[str] = None,
+    user_type: Optional[str] = None,
+    pending: bool = False,
+    fields: Optional[str] = None,
+) -> Tuple[List[Dict], Optional[str]]:
+    check_page_size(limit)
+    survey_fields: Optional[Set[str]] = parse_fields(fields, Survey)
+    q: QueryWithSoftDelete = query_surveys(
+        start_date, end_date, user_id, user_type, pending, survey_fields
+    )
+    surveys, next_cursor = paginate(q, Survey, limit=limit, cursor=cursor)
+    return [survey.to_dict(survey_fields) for survey in surveys], next_cursor
 
-    q: QueryWithSoftDelete = Survey.query
 
-    if start_date:
-        q = q.filter(Survey.modified >= start_date)
-    if end_date:
-        q = q.filter(Survey.modified <= end_date)
+def get_survey_by_uuid(survey_uuid: str) -> Dict:
+    return Survey.query.filter_by(uuid=survey_uuid).first_or_404().to_dict()
 
-    surveys: List[Survey] = q.all()
-    return [survey.to_dict() for survey in surveys]
 
+def search_surveys(survey_uuids: List[str]) -> List[Dict]:
+    """
+    Gets the surveys with the given UUIDs, each with its answers, in the order
+    requested. UUIDs of surveys that do not exist are left out.
+    """
+    max_batch_size: int = current_app.config["MAX_SURVEY_BATCH_SIZE"]
+    if not 1 <= len(survey_uuids) <= max_batch_size:
+        raise ValueError(f"Between 1 and {max_batch_size} survey UUIDs are required")
 
-def get_survey_by_uuid(survey_uuid: str) -> Dict:
-    return Survey.query.filter_by(uuid=survey_uuid).first_or_404().to_dict()
+    surveys: Dict[str, Survey] = {
+        survey.uuid: survey
+        for survey in Survey.query.options(joinedload(Survey.group)).filter(
+            Survey.uuid.in_(survey_uuids)
+        )
+    }
+    answers: Dict[str, List[Dict]] = {survey_uuid: [] for survey_uuid in surveys}
+    for answer in Answer.query.filter(Answer.survey_id.in_(surveys.keys())):
+        answers[answer.survey_id].append(answer.to_dict())
+
+    return [
+        {**surveys[survey_uuid].to_dict(), "answers": answers[survey_uuid]}
+        for survey_uuid in dict.fromkeys(survey_uuids)
+        if survey_uuid in surveys
+    ]
+
+
+def get_survey_bundle(survey_uuid: str) -> Dict:
+    """
+    Gets a survey together with its questions and answers. The survey is the one
+    loaded by the ownership check if there was one, and the questions come from the
+    question catalog, so usually only the answers are queried.
+    """
+    survey: Optional[Survey] = load_surveys([survey_uuid]).get(survey_uuid)
+    if survey is None:
+        abort(404)
+    answers = Answer.query.filter(Answer.survey_id == survey_uuid)
+    return {
+        "survey": survey.to_dict(),
+        "questions": question_controller.get_questions_by_question_group_uuid(
+            survey.group_id
+        ),
+        "answers": [answer.to_dict() for answer in answers],
+    }
+
+
+def get_survey_etag(survey_uuid: str) -> str:
+    # A survey response only changes when the survey or its group does, so the ETag
+    # is made from their modified timestamps without loading the whole survey.
+    modified: Optional[Tuple[datetime, datetime]] = (
+        db.session.query(Survey.modified, Group.modified)
+        .join(Group, Survey.group_id == Group.uuid)
+        .filter(Survey.uuid == survey_uuid, Survey.deleted.is_(None))
+        .first()
+    )
+    if modified is None:
+        abort(404)
+    survey_modified, group_modified = modified
+    return make_etag("survey", survey_uuid, survey_modified, group_modified)
 
 
 def update_survey(survey_uuid: str, survey_details: Dict) -> Dict:
@@ -72,19 +155,177 @@ def update_survey(survey_uuid: str, survey_details: Dict) -> Dict:
 
 
 def get_survey_responses(
-    start_date: Optional[str] = None, end_date: Optional[str] = None
-) -> Generator[str, None, None]:
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    export_format: str = "csv",
+    layout: str = "long",
+) -> Generator[bytes, None, None]:
+    answer_filters: List = _answer_date_filters(start_date, end_date)
+    if layout == "wide":
+        if export_format != "csv":
+            raise ValueError("The wide layout is only available as CSV")
+        return _get_wide_survey_responses(answer_filters)
+
     # select survey_id, question, value from "dhos-dev-dhos-questions".answer a
     # left join "dhos-dev-dhos-questions".question q on q.uuid = a.question_id
-    session = db.session
     j = join(Answer, Question, Answer.question_id == Question.uuid)
-    q = select(
-        [Answer.created, Answer.survey_id, Question.question, Answer.value]
-    ).select_from(j)
+    q = (
+        select(
+            [
+                Answer.created,
+                Answer.survey_id,
+                Question.question,
+                Answer.value.label("answer"),
+            ]
+        )
+        .select_from(j)
+        .where(*answer_filters)
+    )
+
+    if export_format == "parquet":
+        return export_parquet(
+            db.engine,
+            q,
+            fetch_size=current_app.config["EXPORT_FETCH_SIZE"],
+            row_group_size=current_app.config["EXPORT_ROW_GROUP_SIZE"],
+        )
+    return export_csv_shards(
+        db.engine,
+        [q.where(*shard_filters) for shard_filters in _answer_shards(answer_filters)],
+        fetch_size=current_app.config["EXPORT_FETCH_SIZE"],
+        chunk_size=current_app.config["EXPORT_CHUNK_SIZE"],
+        shard_exporter=get_shard_exporter(),
+    )
+
+
+def create_survey_responses_job(
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    export_format: str = "csv",
+    layout: str = "long",
+) -> Dict:
+    # Jobs are identified by their parameters and a watermark of the data they
+    # export, so a job is only run again once the answers or questions change.
+    latest_modified, answer_count = (
+        db.session.query(func.max(Answer.modified), func.count(Answer.uuid))
+        .filter(*_answer_date_filters(start_date, end_date))
+        .one()
+    )
+    job_id: str = make_etag(
+        "survey_responses",
+        start_date,
+        end_date,
+        export_format,
+        layout,
+        latest_modified,
+        answer_count,
+        get_question_catalog().version(),
+    )
+    export_jobs = get_export_jobs()
+    export_jobs.prune()
+    job: Optional[Dict] = export_jobs.get(job_id)
+    if job is None or job["status"] == STATUS_FAILED:
+        export: Generator[bytes, None, None] = get_survey_responses(
+            start_date, end_date, export_format=export_format, layout=layout
+        )
+        details: Dict = {
+            "job_id": job_id,
+            "start_date": start_date,
+            "end_date": end_date,
+            "format": export_format,
+            "layout": layout,
+        }
+        export_jobs.submit(job_id, details, export)
+    return get_survey_responses_job(job_id)
+
+
+def get_survey_responses_job(job_id: str) -> Dict:
+    job: Optional[Dict] = get_export_jobs().get(job_id)
+    if job is None:
+        abort(404)
+    return job
+
+
+def get_survey_responses_job_file(job_id: str) -> Tuple[str, str]:
+    """
+    Gets the path and format of the file written by a complete export job.
+    """
+    job: Dict = get_survey_responses_job(job_id)
+    if job["status"] != STATUS_COMPLETE:
+        abort(409, description=f"Export job is {job['status']}")
+    return get_export_jobs().path(job_id, job["format"]), job["format"]
+
+
+def _get_wide_survey_responses(answer_filters: List) -> Generator[bytes, None, None]:
+    # One column per question answered in the date range, in the order the
+    # questions were created. Columns are named by question text and UUID, as the
+    # text of different questions can be the same.
+    questions: List[Tuple[str, str]] = (
+        db.session.query(Question.uuid, Question.question)
+        .filter(
+            Question.uuid.in_(
+                select([Answer.question_id]).where(*answer_filters).distinct()
+            )
+        )
+        .order_by(Question.created, Question.uuid)
+        .all()
+    )
+    q = (
+        select([Answer.survey_id, Answer.created, Answer.question_id, Answer.value])
+        .where(*answer_filters)
+        .order_by(Answer.survey_id, Answer.created, Answer.value)
+    )
+    return export_wide_csv(
+        db.engine,
+        q,
+        header=["survey_id", "created"]
+        + [f"{question} ({uuid})" for uuid, question in questions],
+        question_ids=[uuid for uuid, _ in questions],
+        fetch_size=current_app.config["EXPORT_FETCH_SIZE"],
+        chunk_size=current_app.config["EXPORT_CHUNK_SIZE"],
+    )
+
+
+def _answer_shards(answer_filters: List) -> List[List]:
+    """
+    Splits the answers matching the filters into shards of EXPORT_SHARD_DAYS days by
+    modified time, so that large exports can be run in parallel. Returns the extra
+    filters for each shard, in date order.
+    """
+    earliest, latest = (
+        db.session.query(func.min(Answer.modified), func.max(Answer.modified))
+        .filter(*answer_filters)
+        .one()
+    )
+    if earliest is None:
+        return [[]]
+
+    shard_length = timedelta(days=current_app.config["EXPORT_SHARD_DAYS"])
+    boundaries: List[datetime] = []
+    boundary: datetime = earliest + shard_length
+    while boundary <= latest:
+        boundaries.append(boundary)
+        boundary += shard_length
+
+    # The first and last shards are left open, so that no answers fall outside them.
+    lower_bounds: List[Optional[datetime]] = [None, *boundaries]
+    upper_bounds: List[Optional[datetime]] = [*boundaries, None]
+    shards: List[List] = []
+    for lower, upper in zip(lower_bounds, upper_bounds):
+        shard_filters: List = []
+        if lower is not None:
+            shard_filters.append(Answer.modified >= lower)
+        if upper is not None:
+            shard_filters.append(Answer.modified < upper)
+        shards.append(shard_filters)
+    return shards
+
 
+def _answer_date_filters(start_date: Optional[str], end_date: Optional[str]) -> List:
+    filters: List = []
     if start_date:
         start_date_parsed: date = parse_iso8601_to_date_typesafe(start_date)
-        q = q.where(Answer.modified >= start_date_parsed)
+        filters.append(Answer.modified >= start_date_parsed)
     if end_date:
         end_date_parsed: date = parse_iso8601_to_date_typesafe(end_date)
         end_date_beginning: datetime = datetime(
@@ -94,24 +335,5 @@ def get_survey_responses(
             tzinfo=timezone.utc,
         )
         end_date_next_midnight: datetime = end_date_beginning + timedelta(days=1)
-        q = q.where(Answer.modified < end_date_next_midnight)
-
-    answers = session.execute(q)
-    header = ["created", "survey_id", "question", "answer"]
-
-    return _iter_csv(data=answers, header=header)
-
-
-def _iter_csv(data: List[Tuple], header: List) -> Generator[str, None, None]:
-    line = StringIO()
-    writer = csv.writer(line)
-    header_written = False
-    for csv_line in data:
-        if header_written is False:
-            writer.writerow(header)
-            header_written = True
-        writer.writerow(csv_line)
-        line.seek(0)
-        yield line.read()
-        line.truncate(0)
-        line.seek(0)
+        filters.append(Answer.modified < end_date_next_midnight)
+    return filters
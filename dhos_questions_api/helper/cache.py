@@ -0,0 +1,177 @@
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Hashable, Optional, Tuple
+
+from flask import Flask, json
+from prometheus_client import Counter
+from she_logging import logger
+
+CACHE_HITS = Counter(
+    "dhos_questions_api_cache_hits_total", "Cache lookups that found a value", ["cache"]
+)
+CACHE_MISSES = Counter(
+    "dhos_questions_api_cache_misses_total",
+    "Cache lookups that did not find a value",
+    ["cache"],
+)
+
+
+class CacheBackend(ABC):
+    """
+    Base class for caches. Subclasses store the values, this class counts the hits
+    and misses for each named cache.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        value: Optional[Any] = self._get(key)
+        if value is None:
+            CACHE_MISSES.labels(cache=self.name).inc()
+        else:
+            CACHE_HITS.labels(cache=self.name).inc()
+        return value
+
+    @abstractmethod
+    def set(self, key: Hashable, value: Any, ttl: Optional[int] = None) -> None: ...
+
+    @abstractmethod
+    def delete(self, key: Hashable) -> None: ...
+
+    @abstractmethod
+    def clear(self) -> None: ...
+
+    @abstractmethod
+    def _get(self, key: Hashable) -> Optional[Any]: ...
+
+
+class LRUCache(CacheBackend):
+    """
+    A small thread-safe in-process cache that evicts the least recently used entry
+    once it holds more than `maxsize` entries.
+    """
+
+    def __init__(self, maxsize: int, name: str = "default") -> None:
+        super().__init__(name)
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, Tuple[Any, Optional[float]]]" = (
+            OrderedDict()
+        )
+        self._lock = Lock()
+
+    def _get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            if key not in self._entries:
+                return None
+            value, expires_at = self._entries[key]
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[int] = None) -> None:
+        expires_at: Optional[float] = None if ttl is None else time.monotonic() + ttl
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RedisCache(CacheBackend):
+    """
+    A cache shared between instances of the service, stored in Redis (or anything
+    else that speaks the Redis protocol). Values are stored as JSON, and keys are
+    prefixed with the cache name so that caches can share a database. Failures to
+    reach Redis are logged and treated as cache misses.
+    """
+
+    def __init__(self, client: Any, name: str, ttl: Optional[int] = None) -> None:
+        super().__init__(name)
+        self.client = client
+        self.ttl = ttl
+
+    def _get(self, key: Hashable) -> Optional[Any]:
+        try:
+            value: Optional[str] = self.client.get(self._redis_key(key))
+        except Exception:
+            logger.warning("Failed to get key from cache %s", self.name, exc_info=True)
+            return None
+        if value is None:
+            return None
+        return json.loads(value)
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[int] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        if ttl is not None and ttl <= 0:
+            # Redis rejects non-positive expiry times, and the value would
+            # have expired straight away in any case.
+            return
+        try:
+            self.client.set(self._redis_key(key), json.dumps(value), ex=ttl)
+        except Exception:
+            logger.warning("Failed to set key in cache %s", self.name, exc_info=True)
+
+    def delete(self, key: Hashable) -> None:
+        try:
+            self.client.delete(self._redis_key(key))
+        except Exception:
+            logger.warning(
+                "Failed to delete key from cache %s", self.name, exc_info=True
+            )
+
+    def clear(self) -> None:
+        try:
+            keys = list(self.client.scan_iter(match=f"{self._prefix()}*"))
+            if keys:
+                self.client.delete(*keys)
+        except Exception:
+            logger.warning("Failed to clear cache %s", self.name, exc_info=True)
+
+    def _prefix(self) -> str:
+        return f"dhos-questions-api:{self.name}:"
+
+    def _redis_key(self, key: Hashable) -> str:
+        parts = key if isinstance(key, tuple) else (key,)
+        return self._prefix() + ":".join(str(part) for part in parts)
+
+
+def create_cache(app: Flask, name: str, maxsize: int) -> CacheBackend:
+    """
+    Creates a cache for values that can be shared between instances of the service.
+    This is a Redis cache when Redis is installed, otherwise an in-process LRU cache.
+    """
+    if not app.config.get("REDIS_INSTALLED"):
+        return LRUCache(maxsize=maxsize, name=name)
+
+    # Imported here so that redis is only needed when it is installed. The client
+    # is set up like dhosredis's own, from the same configuration.
+    import dhosredis
+    from redis import Redis
+
+    client = Redis(
+        host=dhosredis.config["REDIS_HOST"],
+        port=dhosredis.config["REDIS_PORT"],
+        password=dhosredis.config["REDIS_PASSWORD"],
+        db=0,
+        socket_timeout=dhosredis.config["REDIS_TIMEOUT"],
+        decode_responses=True,
+        ssl=dhosredis.config["REDIS_USE_SSL"],
+    )
+    logger.info("Using Redis for cache %s", name)
+    return RedisCache(client, name=name, ttl=app.config["CACHE_TTL_SECONDS"])
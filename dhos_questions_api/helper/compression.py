@@ -0,0 +1,99 @@
+import zlib
+from typing import Any, Callable, Generator, Iterable, List, Optional, cast
+
+from flask import Response, request
+
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+# Responses that are already built are only compressed if they are at least this big.
+MIN_COMPRESS_SIZE = 1024
+
+
+def compress_response(response: Response) -> Response:
+    """
+    Compresses a response with the best encoding the client accepts (zstd if the
+    optional zstandard package is installed, otherwise gzip). Streamed responses are
+    compressed chunk by chunk as they are generated rather than being buffered.
+    """
+    encoding: Optional[str] = request.accept_encodings.best_match(
+        _available_encodings()
+    )
+    response.vary.add("Accept-Encoding")
+    if encoding is None or response.status_code != 200:
+        return response
+
+    if response.is_streamed:
+        chunks: Iterable[bytes] = cast(Iterable[bytes], response.response)
+    else:
+        data: bytes = response.get_data()
+        if len(data) < MIN_COMPRESS_SIZE:
+            return response
+        chunks = [data]
+
+    compressor = _compressors[encoding]()
+    response.response = _compress(chunks, compressor)
+    response.headers["Content-Encoding"] = encoding
+    response.headers.pop("Content-Length", None)
+    # Stops the compressed stream being read into memory to compute an ETag.
+    response.direct_passthrough = True
+    return response
+
+
+def _compress(chunks: Iterable[bytes], compressor: Any) -> Generator[bytes, None, None]:
+    try:
+        for chunk in chunks:
+            # Flushing after each chunk sends the client everything generated so far.
+            compressed: bytes = compressor.compress(chunk) + compressor.flush(
+                compressor.sync_flush
+            )
+            if compressed:
+                yield compressed
+        yield compressor.flush(compressor.finish)
+    finally:
+        close: Optional[Callable] = getattr(chunks, "close", None)
+        if close is not None:
+            close()
+
+
+class _GzipCompressor:
+    sync_flush = zlib.Z_SYNC_FLUSH
+    finish = zlib.Z_FINISH
+
+    def __init__(self) -> None:
+        # wbits of 16 + MAX_WBITS writes a gzip header and trailer.
+        self._compressor = zlib.compressobj(
+            GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS
+        )
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self, mode: int) -> bytes:
+        return self._compressor.flush(mode)
+
+
+class _ZstdCompressor:
+    def __init__(self) -> None:
+        # Imported here as zstandard is an optional dependency.
+        import zstandard
+
+        self.sync_flush = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        self.finish = zstandard.COMPRESSOBJ_FLUSH_FINISH
+        self._compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self, mode: int) -> bytes:
+        return self._compressor.flush(mode)
+
+
+_compressors = {"gzip": _GzipCompressor, "zstd": _ZstdCompressor}
+
+
+def _available_encodings() -> List[str]:
+    try:
+        import zstandard  # noqa: F401
+    except ImportError:
+        return ["gzip"]
+    return ["zstd", "gzip"]
@@ -0,0 +1,28 @@
+from hashlib import sha256
+from typing import Any, Callable
+
+from flask import Response, jsonify, request
+from she_logging import logger
+
+
+def make_etag(*parts: Any) -> str:
+    """
+    Makes a strong ETag from values that change whenever the response body would,
+    such as UUIDs, modified timestamps and the question catalog version.
+    """
+    return sha256("|".join(str(part) for part in parts).encode("utf8")).hexdigest()
+
+
+def conditional_json_response(etag: str, build: Callable[[], Any]) -> Response:
+    """
+    Responds with 304 Not Modified if the request's If-None-Match header matches the
+    ETag, without building the body. Otherwise responds with the JSON returned by
+    `build`, tagged with the ETag.
+    """
+    if request.if_none_match.contains_weak(etag):
+        logger.debug("304 Not Modified - ETag matched before building response")
+        response = Response(status=304)
+    else:
+        response = jsonify(build())
+    response.set_etag(etag)
+    return response
@@ -0,0 +1,376 @@
+import csv
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from io import RawIOBase, StringIO
+from itertools import chain, groupby, islice
+from operator import itemgetter
+from queue import Full, Queue
+from typing import (
+    Any,
+    Dict,
+    Generator,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from flask import Flask, abort, current_app
+from she_logging import logger
+from sqlalchemy import DateTime, create_engine
+from sqlalchemy.engine import Engine, Row, make_url
+from sqlalchemy.sql import Select
+
+try:
+    # pyarrow is an optional dependency (the parquet extra), only needed for
+    # Parquet exports.
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+# Separates the answers to a question in a wide export, when there are several.
+# Separators (and backslashes) within an answer are escaped with a backslash.
+MULTIPLE_ANSWER_SEPARATOR = ";"
+MULTIPLE_ANSWER_ESCAPE = "\\"
+
+# How long the COPY thread waits for the client to take a chunk before checking
+# whether the export has been abandoned.
+COPY_QUEUE_TIMEOUT_SECONDS = 1.0
+
+
+def export_csv_shards(
+    engine: Engine,
+    queries: Sequence[Select],
+    fetch_size: int,
+    chunk_size: int,
+    shard_exporter: Optional["ShardExporter"],
+) -> Generator[bytes, None, None]:
+    """
+    Exports the results of several queries with the same columns, such as one query
+    split into date ranges, as one CSV in the order of the queries. With a shard
+    exporter (on PostgreSQL) several of the queries can run at the same time,
+    otherwise they run one after another.
+    """
+    header: List[str] = [column.name for column in queries[0].selected_columns]
+    if shard_exporter is not None:
+        return shard_exporter.copy_csv(queries, chunk_size=chunk_size)
+    return iter_csv(
+        data=chain.from_iterable(
+            stream_rows(engine, query, fetch_size) for query in queries
+        ),
+        header=header,
+        chunk_size=chunk_size,
+    )
+
+
+def export_wide_csv(
+    engine: Engine,
+    query: Select,
+    header: List[str],
+    question_ids: List[str],
+    fetch_size: int,
+    chunk_size: int,
+) -> Generator[bytes, None, None]:
+    """
+    Exports answers as CSV with one row per survey and one column per question. The
+    query must return (survey_id, created, question_id, value) rows ordered by
+    survey, so that each survey's row can be written as soon as its answers have
+    been read.
+    """
+    return iter_csv(
+        data=pivot_answers(stream_rows(engine, query, fetch_size), question_ids),
+        header=header,
+        chunk_size=chunk_size,
+    )
+
+
+def pivot_answers(
+    rows: Iterable[Tuple], question_ids: List[str]
+) -> Generator[Tuple, None, None]:
+    """
+    Turns (survey_id, created, question_id, value) rows, ordered by survey, into one
+    (survey_id, first created, *values) row per survey. Multiple answers to the same
+    question (such as multi-select questions) are joined with MULTIPLE_ANSWER_SEPARATOR,
+    escaping any separators within the answers.
+    """
+    columns: Dict[str, int] = {uuid: i for i, uuid in enumerate(question_ids)}
+    for survey_id, survey_rows in groupby(rows, key=itemgetter(0)):
+        values: List[List[str]] = [[] for _ in question_ids]
+        created: Optional[datetime] = None
+        for _, answer_created, question_id, value in survey_rows:
+            if created is None:
+                created = answer_created
+            # Answers to questions added since the header was written are left out.
+            if question_id in columns:
+                values[columns[question_id]].append(value)
+        yield (
+            survey_id,
+            created,
+            *(_join_answers(answers) for answers in values),
+        )
+
+
+def _join_answers(answers: List[str]) -> str:
+    return MULTIPLE_ANSWER_SEPARATOR.join(
+        answer.replace(MULTIPLE_ANSWER_ESCAPE, MULTIPLE_ANSWER_ESCAPE * 2).replace(
+            MULTIPLE_ANSWER_SEPARATOR,
+            MULTIPLE_ANSWER_ESCAPE + MULTIPLE_ANSWER_SEPARATOR,
+        )
+        for answer in answers
+    )
+
+
+def export_parquet(
+    engine: Engine, query: Select, fetch_size: int, row_group_size: int
+) -> Generator[bytes, None, None]:
+    """
+    Exports the results of a query as a Parquet file, streamed one row group at a
+    time. Needs pyarrow, from the parquet extra.
+    """
+    if pyarrow is None:
+        abort(501, description="Parquet export is not available on this server")
+
+    schema = pyarrow.schema(
+        [
+            (
+                column.name,
+                (
+                    pyarrow.timestamp("us", tz="UTC")
+                    if isinstance(column.type, DateTime)
+                    else pyarrow.string()
+                ),
+            )
+            for column in query.selected_columns
+        ]
+    )
+    return _iter_parquet(
+        rows=stream_rows(engine, query, fetch_size),
+        schema=schema,
+        row_group_size=row_group_size,
+    )
+
+
+def _iter_parquet(
+    rows: Iterable[Tuple], schema: Any, row_group_size: int
+) -> Generator[bytes, None, None]:
+    sink = _BytesSink()
+    writer = pyarrow.parquet.ParquetWriter(sink, schema)
+    iterator = iter(rows)
+    while True:
+        batch: List[Tuple] = list(islice(iterator, row_group_size))
+        if not batch:
+            break
+        columns = [
+            pyarrow.array(column, type=field.type)
+            for column, field in zip(zip(*batch), schema)
+        ]
+        writer.write_table(pyarrow.Table.from_arrays(columns, schema=schema))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+class _BytesSink(RawIOBase):
+    """
+    Writable file object that keeps what is written to it until it is drained, so
+    a file can be streamed while it is being written.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: Any) -> int:
+        chunk = bytes(data)
+        self._chunks.append(chunk)
+        self._position += len(chunk)
+        return len(chunk)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_rows(
+    engine: Engine, query: Select, fetch_size: int
+) -> Generator[Row, None, None]:
+    # The response is streamed after the request (and its session) has finished, so
+    # the rows are read from a connection of their own. With stream_results the rows
+    # are fetched from a server-side cursor `fetch_size` at a time, rather than the
+    # whole result being loaded into memory before the first row is returned.
+    with engine.connect() as connection:
+        result = connection.execution_options(
+            stream_results=True, max_row_buffer=fetch_size
+        ).execute(query)
+        yield from result
+
+
+def iter_csv(
+    data: Iterable[Tuple], header: List, chunk_size: int
+) -> Generator[bytes, None, None]:
+    # Rows are collected into chunks of about `chunk_size` characters, so that large
+    # exports are written to the client in a few big writes rather than one per row.
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    for csv_line in data:
+        writer.writerow(csv_line)
+        if buffer.tell() >= chunk_size:
+            yield buffer.getvalue().encode("utf8")
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell() > 0:
+        yield buffer.getvalue().encode("utf8")
+
+
+class ShardExporter:
+    """
+    Streams the results of several queries as one CSV produced by PostgreSQL's COPY,
+    with the header of the first. COPY writes to a file object and only returns once
+    it has finished, so each query runs in a thread that hands chunks to the
+    response through a queue of its own, and the results are sent in the order of
+    the queries. As the queues are bounded, a slow client holds back the database
+    rather than filling memory.
+
+    The threads are shared by every export in the process, and each takes its
+    connection from a pool of the same size kept apart from the one used by
+    requests, so exports never starve requests of connections nor wait for one
+    themselves. Queries are queued in order, so an export's first unfinished query
+    always has a thread before any of its later ones, and exports waiting on their
+    clients can never hold up each other's progress.
+    """
+
+    def __init__(self, engine: Engine, workers: int) -> None:
+        self.engine = engine
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="copy-csv"
+        )
+
+    def copy_csv(
+        self, queries: Sequence[Select], chunk_size: int
+    ) -> Generator[bytes, None, None]:
+        abandoned = threading.Event()
+        shards: List["Queue[Union[bytes, BaseException, None]]"] = []
+        futures: List[Future] = []
+        for i, query in enumerate(queries):
+            chunks: "Queue[Union[bytes, BaseException, None]]" = Queue(maxsize=4)
+            futures.append(
+                self._executor.submit(
+                    _run_copy,
+                    self.engine,
+                    query,
+                    _ChunkWriter(chunks, abandoned, chunk_size),
+                    header=i == 0,
+                )
+            )
+            shards.append(chunks)
+        try:
+            for chunks in shards:
+                while True:
+                    chunk = chunks.get()
+                    if chunk is None:
+                        break
+                    if isinstance(chunk, BaseException):
+                        raise chunk
+                    yield chunk
+        finally:
+            abandoned.set()
+            for future in futures:
+                future.cancel()
+
+
+class _ChunkWriter:
+    """
+    File object for COPY to write to, which collects the rows it is given into
+    chunks and puts them on a queue.
+    """
+
+    def __init__(
+        self, chunks: Queue, abandoned: threading.Event, chunk_size: int
+    ) -> None:
+        self.chunks = chunks
+        self.abandoned = abandoned
+        self.chunk_size = chunk_size
+        self._buffer = bytearray()
+
+    def write(self, data: Union[bytes, str]) -> None:
+        self._buffer += data.encode("utf8") if isinstance(data, str) else data
+        if len(self._buffer) >= self.chunk_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._buffer:
+            self.put(bytes(self._buffer))
+            self._buffer.clear()
+
+    def put(self, item: Optional[Any]) -> None:
+        while True:
+            if self.abandoned.is_set():
+                raise IOError("CSV export abandoned by the client")
+            try:
+                self.chunks.put(item, timeout=COPY_QUEUE_TIMEOUT_SECONDS)
+                return
+            except Full:
+                continue
+
+
+def _run_copy(
+    engine: Engine, query: Select, writer: _ChunkWriter, header: bool = True
+) -> None:
+    if writer.abandoned.is_set():
+        return
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        compiled = query.compile(dialect=engine.dialect)
+        select_sql: str = cursor.mogrify(str(compiled), compiled.params).decode("utf8")
+        options: str = "CSV HEADER" if header else "CSV"
+        cursor.copy_expert(f"COPY ({select_sql}) TO STDOUT WITH {options}", writer)
+        writer.flush()
+        writer.put(None)
+    except Exception as e:
+        if writer.abandoned.is_set():
+            logger.info("CSV export abandoned by the client")
+        else:
+            logger.exception("CSV export failed")
+            try:
+                writer.put(e)
+            except IOError:
+                pass
+    finally:
+        connection.close()
+
+
+def init_shard_exporter(app: Flask) -> None:
+    # Only PostgreSQL exports shards with COPY. The shard connections are configured
+    # like the app's own, apart from the size of the pool.
+    database_uri: str = app.config["SQLALCHEMY_DATABASE_URI"]
+    if make_url(database_uri).get_backend_name() != "postgresql":
+        app.extensions["shard_exporter"] = None
+        return
+    workers: int = app.config["EXPORT_SHARD_WORKERS"]
+    engine: Engine = create_engine(
+        database_uri,
+        **{
+            **app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {}),
+            "pool_size": workers,
+            "max_overflow": 0,
+        },
+    )
+    app.extensions["shard_exporter"] = ShardExporter(engine, workers=workers)
+
+
+def get_shard_exporter() -> Optional[ShardExporter]:
+    return current_app.extensions["shard_exporter"]
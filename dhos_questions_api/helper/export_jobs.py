@@ -0,0 +1,185 @@
+import json
+import os
+import re
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Lock, Thread
+from typing import Dict, Iterable, Optional, Set
+
+from flask import Flask, current_app
+from she_logging import logger
+
+JOB_ID_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+STATUS_RUNNING = "running"
+STATUS_COMPLETE = "complete"
+STATUS_FAILED = "failed"
+
+
+class ExportJobs:
+    """
+    Runs exports in a bounded pool of background threads and keeps the results in
+    files in a directory, which must be shared by every instance of the service. A
+    job's state is worked out from its files alone, so any instance can report on a
+    job started by another: `<job_id>.json` holds the job's details, `<job_id>.part`
+    is an export being written, `<job_id>.<format>` is a finished export and
+    `<job_id>.error` records why an export failed. The instance an export was
+    submitted to touches its `.part` file every so often, from when it is queued
+    until it is finished, and an export whose `.part` file has not been touched for
+    `stale_seconds` is taken to have been interrupted.
+    """
+
+    def __init__(
+        self, directory: str, workers: int, max_age_seconds: int, stale_seconds: int
+    ) -> None:
+        self.directory = directory
+        self.max_age_seconds = max_age_seconds
+        self.stale_seconds = stale_seconds
+        os.makedirs(directory, exist_ok=True)
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="export-job"
+        )
+        self._lock = Lock()
+        self._claimed: Set[str] = set()
+        Thread(target=self._heartbeat, name="export-job-heartbeat", daemon=True).start()
+
+    def path(self, job_id: str, suffix: str) -> str:
+        if not JOB_ID_PATTERN.match(job_id):
+            raise ValueError(f"Invalid export job id '{job_id}'")
+        return os.path.join(self.directory, f"{job_id}.{suffix}")
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """
+        Gets the details of a job with its status, or None if there is no such job.
+        """
+        try:
+            with open(self.path(job_id, "json")) as f:
+                details: Dict = json.load(f)
+        except FileNotFoundError:
+            return None
+
+        result_path: str = self.path(job_id, details["format"])
+        if os.path.exists(result_path):
+            details["status"] = STATUS_COMPLETE
+            details["size"] = os.path.getsize(result_path)
+        elif os.path.exists(self.path(job_id, "error")):
+            details["status"] = STATUS_FAILED
+        elif self._is_running(job_id):
+            details["status"] = STATUS_RUNNING
+        else:
+            # The export was interrupted, for example by the service restarting.
+            details["status"] = STATUS_FAILED
+        return details
+
+    def submit(
+        self, job_id: str, details: Dict, export: Iterable[bytes]
+    ) -> Optional[Future]:
+        """
+        Starts writing an export in the background, unless the job has already
+        finished or is still running on any instance. `details` must include the
+        format of the export, which is used as the extension of the file.
+        """
+        with self._lock:
+            existing: Optional[Dict] = self.get(job_id)
+            if existing is not None and existing["status"] != STATUS_FAILED:
+                _close(export)
+                return None
+            self._remove(job_id, "error")
+            self._remove(job_id, "part")
+            try:
+                # Created exclusively, so that only one instance runs the export.
+                open(self.path(job_id, "part"), "xb").close()
+            except FileExistsError:
+                _close(export)
+                return None
+            self._claimed.add(job_id)
+            # Written then renamed, so the details are never read half written.
+            details_path: str = self.path(job_id, "json")
+            with open(f"{details_path}.tmp", "w") as f:
+                json.dump(details, f)
+            os.replace(f"{details_path}.tmp", details_path)
+            return self._executor.submit(self._run, job_id, details["format"], export)
+
+    def prune(self) -> None:
+        """
+        Deletes the files of jobs that were created more than `max_age_seconds` ago.
+        """
+        expires_before: float = time.time() - self.max_age_seconds
+        for entry in os.scandir(self.directory):
+            job_id, _, suffix = entry.name.partition(".")
+            if (
+                suffix != "json"
+                or not JOB_ID_PATTERN.match(job_id)
+                or self._is_running(job_id)
+            ):
+                continue
+            if entry.stat().st_mtime < expires_before:
+                for name in os.listdir(self.directory):
+                    if name.startswith(f"{job_id}."):
+                        self._remove(job_id, name.partition(".")[2])
+                logger.info("Deleted expired export job %s", job_id)
+
+    def _is_running(self, job_id: str) -> bool:
+        try:
+            touched: float = os.path.getmtime(self.path(job_id, "part"))
+        except FileNotFoundError:
+            return False
+        return touched >= time.time() - self.stale_seconds
+
+    def _run(self, job_id: str, export_format: str, export: Iterable[bytes]) -> None:
+        part_path: str = self.path(job_id, "part")
+        try:
+            with open(part_path, "wb") as f:
+                for chunk in export:
+                    f.write(chunk)
+            # The finished file only appears once it has been written completely.
+            os.replace(part_path, self.path(job_id, export_format))
+            logger.info("Export job %s complete", job_id)
+        except Exception as e:
+            logger.exception("Export job %s failed", job_id)
+            with open(self.path(job_id, "error"), "w") as f:
+                f.write(str(e))
+            self._remove(job_id, "part")
+        finally:
+            with self._lock:
+                self._claimed.discard(job_id)
+            _close(export)
+
+    def _heartbeat(self) -> None:
+        # Touches the files of the jobs submitted to this instance, whether queued
+        # or running, often enough that other instances never take them to have
+        # been interrupted.
+        while True:
+            time.sleep(self.stale_seconds / 4)
+            with self._lock:
+                claimed: Set[str] = set(self._claimed)
+            for job_id in claimed:
+                try:
+                    os.utime(self.path(job_id, "part"))
+                except FileNotFoundError:
+                    pass
+
+    def _remove(self, job_id: str, suffix: str) -> None:
+        try:
+            os.remove(self.path(job_id, suffix))
+        except FileNotFoundError:
+            pass
+
+
+def _close(export: Iterable[bytes]) -> None:
+    close = getattr(export, "close", None)
+    if close is not None:
+        close()
+
+
+def init_export_jobs(app: Flask) -> None:
+    app.extensions["export_jobs"] = ExportJobs(
+        directory=app.config["EXPORT_JOB_DIR"],
+        workers=app.config["EXPORT_JOB_WORKERS"],
+        max_age_seconds=app.config["EXPORT_JOB_MAX_AGE_SECONDS"],
+        stale_seconds=app.config["EXPORT_JOB_STALE_SECONDS"],
+    )
+
+
+def get_export_jobs() -> ExportJobs:
+    return current_app.extensions["export_jobs"]
@@ -0,0 +1,74 @@
+from datetime import datetime, timezone
+from typing import Any, Callable, Collection, Dict, List, Optional, Set
+
+from flask_batteries_included.sqldb import ModelIdentifier
+from sqlalchemy.orm import Query, load_only
+
+# The columns behind the identifier fields returned with every model.
+IDENTIFIER_COLUMNS: Dict[str, List[str]] = {
+    "uuid": ["uuid"],
+    "created": ["created"],
+    "created_by": ["created_by_"],
+    "modified": ["modified"],
+    "modified_by": ["modified_by_"],
+}
+
+
+def parse_fields(fields: Optional[str], model: Any) -> Optional[Set[str]]:
+    """
+    Parses a comma separated list of the fields to return for a model, as given in a
+    `fields` query parameter. Returns None, meaning every field, if there isn't one.
+    """
+    if fields is None:
+        return None
+    requested: Set[str] = {field.strip() for field in fields.split(",")} - {""}
+    if not requested:
+        raise ValueError("fields must name at least one field")
+    unknown: Set[str] = requested - model.FIELD_COLUMNS.keys()
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    return requested
+
+
+def load_fields(query: Query, model: Any, fields: Optional[Set[str]]) -> Query:
+    """
+    Restricts a query to the columns behind the requested fields. The uuid and
+    modified columns are always loaded, as pages are ordered by them.
+    """
+    if fields is None:
+        return query
+    columns: Set[str] = {"uuid", "modified"}.union(
+        *(model.FIELD_COLUMNS[field] for field in fields)
+    )
+    return query.options(
+        load_only(*(getattr(model, column) for column in sorted(columns)))
+    )
+
+
+def field_selector(fields: Optional[Collection[str]]) -> Callable[[str], bool]:
+    if fields is None:
+        return lambda field: True
+    return lambda field: field in fields
+
+
+def pack_identifier_fields(
+    model: ModelIdentifier, fields: Optional[Collection[str]]
+) -> Dict[str, Any]:
+    """
+    Like ModelIdentifier.pack_identifier, but only reads the requested fields, so
+    that columns left out of the query are not loaded one row at a time.
+    """
+    if fields is None:
+        return model.pack_identifier()
+    values: Dict[str, Callable[[], Any]] = {
+        "uuid": lambda: model.uuid,
+        "created": lambda: _utc(model.created),
+        "created_by": lambda: model.created_by,
+        "modified": lambda: _utc(model.modified),
+        "modified_by": lambda: model.modified_by,
+    }
+    return {field: value() for field, value in values.items() if field in fields}
+
+
+def _utc(timestamp: Optional[datetime]) -> Optional[datetime]:
+    return timestamp.replace(tzinfo=timezone.utc) if timestamp else None
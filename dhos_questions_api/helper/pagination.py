@@ -0,0 +1,67 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+
+from flask import current_app
+from sqlalchemy import literal, tuple_
+from sqlalchemy.orm import Query
+
+
+def encode_cursor(modified: datetime, uuid: str) -> str:
+    """
+    Encodes the position after a row as an opaque cursor for the next page.
+    """
+    position: str = json.dumps([modified.isoformat(), uuid])
+    return base64.urlsafe_b64encode(position.encode("utf8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        modified, uuid = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return datetime.fromisoformat(modified), str(uuid)
+    except (ValueError, TypeError):
+        raise ValueError(f"Invalid cursor '{cursor}'")
+
+
+def check_page_size(limit: Optional[int]) -> None:
+    max_page_size: int = current_app.config["MAX_PAGE_SIZE"]
+    if limit is not None and not 1 <= limit <= max_page_size:
+        raise ValueError(f"limit must be between 1 and {max_page_size}")
+
+
+def order_page(query: Query, model: Any, cursor: Optional[str]) -> Query:
+    """
+    Orders a query by the model's (modified, uuid) columns, starting after the
+    position given by the cursor if there is one.
+    """
+    query = query.order_by(model.modified, model.uuid)
+    if cursor is not None:
+        modified, uuid = decode_cursor(cursor)
+        query = query.filter(
+            tuple_(model.modified, model.uuid)
+            > tuple_(
+                literal(modified, model.modified.type), literal(uuid, model.uuid.type)
+            )
+        )
+    return query
+
+
+def paginate(
+    query: Query, model: Any, limit: Optional[int], cursor: Optional[str]
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    Gets a page of results from a query, using keyset pagination on the model's
+    (modified, uuid) columns so that every page costs the same to load. Returns the
+    rows and the cursor for the next page, or None if this is the last page. Without
+    a limit all of the remaining rows are returned.
+    """
+    query = order_page(query, model, cursor)
+    if limit is None:
+        return query.all(), None
+
+    rows: List[Any] = query.limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    last = rows[limit - 1]
+    return rows[:limit], encode_cursor(last.modified, last.uuid)
@@ -0,0 +1,97 @@
+from hashlib import sha256
+from threading import Lock
+from typing import Any, Callable, Optional, Tuple
+
+from flask import Flask, current_app
+from flask_batteries_included.sqldb import db
+from she_logging import logger
+from sqlalchemy import func, select
+
+from dhos_questions_api.helper.cache import CacheBackend, create_cache
+from dhos_questions_api.models.group import Group
+from dhos_questions_api.models.question import Question
+from dhos_questions_api.models.question_option import QuestionOption
+from dhos_questions_api.models.question_option_type import QuestionOptionType
+from dhos_questions_api.models.question_type import QuestionType
+
+CATALOG_MODELS = (Question, QuestionType, QuestionOption, QuestionOptionType, Group)
+
+
+class QuestionCatalog:
+    """
+    Cache of serialised questions. Entries are keyed by a version stamp of the catalog
+    tables (questions, question types, options, option types and groups), so any
+    change to those tables makes the existing entries unreachable. The stamp is
+    cached for at most `check_seconds` before being re-read from the database, and is
+    dropped straight away after a change made through the service. When the cache is
+    shared between instances, so are the stamp and its invalidation.
+    """
+
+    VERSION_KEY = "version"
+
+    def __init__(
+        self, check_seconds: int, entries: CacheBackend, survey_groups: CacheBackend
+    ) -> None:
+        self.check_seconds = check_seconds
+        self._entries = entries
+        self._survey_groups = survey_groups
+        self._lock = Lock()
+
+    def version(self) -> str:
+        version: Optional[str] = self._entries.get(self.VERSION_KEY)
+        if version is None:
+            with self._lock:
+                version = load_catalog_version()
+                self._entries.set(self.VERSION_KEY, version, ttl=self.check_seconds)
+        return version
+
+    def get(self, key: Tuple, loader: Callable[[], Any]) -> Any:
+        versioned_key = (self.version(), *key)
+        value: Any = self._entries.get(versioned_key)
+        if value is None:
+            value = loader()
+            self._entries.set(versioned_key, value)
+        return value
+
+    def get_survey_group(self, survey_uuid: str, loader: Callable[[], str]) -> str:
+        # A survey's group never changes, so this mapping is not versioned.
+        group_uuid: Optional[str] = self._survey_groups.get(survey_uuid)
+        if group_uuid is None:
+            group_uuid = loader()
+            self._survey_groups.set(survey_uuid, group_uuid)
+        return group_uuid
+
+    def invalidate(self) -> None:
+        self._entries.delete(self.VERSION_KEY)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._survey_groups.clear()
+
+
+def load_catalog_version() -> str:
+    """
+    Computes the version stamp of the catalog tables from the latest modified
+    timestamp and row count of each table, in a single query.
+    """
+    columns = []
+    for model in CATALOG_MODELS:
+        columns.append(select(func.max(model.modified)).scalar_subquery())
+        columns.append(select(func.count()).select_from(model).scalar_subquery())
+    row = db.session.execute(select(*columns)).one()
+    version: str = sha256(repr(tuple(row)).encode("utf8")).hexdigest()
+    logger.debug("Question catalog version is %s", version)
+    return version
+
+
+def init_question_catalog(app: Flask) -> None:
+    maxsize: int = app.config["QUESTION_CATALOG_CACHE_SIZE"]
+    app.extensions["question_catalog"] = QuestionCatalog(
+        check_seconds=app.config["QUESTION_CATALOG_CHECK_SECONDS"],
+        entries=create_cache(app, name="question_catalog", maxsize=maxsize),
+        survey_groups=create_cache(app, name="survey_group", maxsize=maxsize),
+    )
+
+
+def get_question_catalog() -> QuestionCatalog:
+    return current_app.extensions["question_catalog"]
@@ -0,0 +1,171 @@
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from flask_batteries_included.sqldb import db
+from she_logging import logger
+from sqlalchemy.orm import joinedload
+
+from dhos_questions_api.helper.cache import LRUCache
+from dhos_questions_api.models.question import Question
+from dhos_questions_api.models.question_option import QuestionOption
+
+# Question types (see models/question_type.py) that accept a single answer
+SINGLE_ANSWER_TYPES = (0, 1, 3, 4, 5)
+# Question types whose answers must be one of the question options
+SINGLE_OPTION_TYPES = (3,)
+MULTIPLE_OPTION_TYPES = (2, 6)
+INTEGER_TYPES = (1,)
+RANGE_TYPES = (5,)
+
+# Question option types (see models/question_option_type.py) describing a range
+RANGE_START = 2
+RANGE_END = 3
+RANGE_INTERVAL = 4
+
+_validators: LRUCache = LRUCache(maxsize=1024, name="question_validator")
+
+
+class QuestionValidator:
+    """
+    The rules that answers to a single question must satisfy, compiled from the
+    question type and options so that answers can be checked without walking the
+    options or parsing the range bounds each time.
+    """
+
+    def __init__(
+        self, question_uuid: str, question_type: int, options: Iterable[QuestionOption]
+    ) -> None:
+        self.question_uuid = question_uuid
+        self.question_type = question_type
+        self.single_answer: bool = question_type in SINGLE_ANSWER_TYPES
+
+        values: List[str] = []
+        bounds: Dict[int, Optional[float]] = {}
+        for option in options:
+            values.append(option.value)
+            option_type: int = option.question_option_type.value
+            if question_type in RANGE_TYPES and option_type in (
+                RANGE_START,
+                RANGE_END,
+                RANGE_INTERVAL,
+            ):
+                bounds[option_type] = _parse_float(option.value)
+
+        self.allowed_values: FrozenSet[str] = frozenset(values)
+        self.range_min: Optional[float] = bounds.get(RANGE_START)
+        self.range_max: Optional[float] = bounds.get(RANGE_END)
+        self.range_interval: Optional[float] = bounds.get(RANGE_INTERVAL)
+
+    def validate(self, answers: List[Dict]) -> bool:
+        if self.single_answer and len(answers) > 1:
+            logger.info(
+                "%d answers sent for question %s when only 1 was expected",
+                len(answers),
+                self.question_uuid,
+            )
+            return False
+
+        if self.question_type in INTEGER_TYPES:
+            return _parse_int(answers[0]["value"]) is not None
+
+        if self.question_type in SINGLE_OPTION_TYPES:
+            return self._is_available_option(answers[0]["value"])
+
+        if self.question_type in RANGE_TYPES:
+            return self._is_in_range(answers[0]["value"])
+
+        if self.question_type in MULTIPLE_OPTION_TYPES:
+            values = [answer["value"] for answer in answers]
+            if len(set(values)) != len(values):
+                logger.info("Duplicate answer values sent for %s", self.question_uuid)
+                return False
+            return all(self._is_available_option(value) for value in values)
+
+        return True
+
+    def _is_available_option(self, value: str) -> bool:
+        if value in self.allowed_values:
+            return True
+        logger.info("Answer value %s is not in the available options", value)
+        return False
+
+    def _is_in_range(self, answer_value: str) -> bool:
+        if self.range_min is None or self.range_max is None or not self.range_interval:
+            logger.warning("Question %s has an incomplete range", self.question_uuid)
+            return False
+
+        value: Optional[float] = _parse_float(answer_value)
+        if (
+            value is not None
+            and self.range_min <= value <= self.range_max
+            and (value - self.range_min) % self.range_interval == 0
+        ):
+            return True
+
+        logger.info(
+            "Answer not in acceptable range",
+            extra={
+                "answer_value": answer_value,
+                "answer_min": self.range_min,
+                "answer_max": self.range_max,
+                "answer_interval": self.range_interval,
+            },
+        )
+        return False
+
+
+def get_validators(questions: Iterable[Question]) -> Dict[str, QuestionValidator]:
+    """
+    Gets the validators for the given questions. Validators are cached by question UUID
+    and modified timestamp, and the options of any questions missing from the cache are
+    loaded in a single query.
+    """
+    validators: Dict[str, QuestionValidator] = {}
+    missing: Dict[str, Question] = {}
+    for question in questions:
+        validator = _validators.get(_cache_key(question))
+        if validator is None:
+            missing[question.uuid] = question
+        else:
+            validators[question.uuid] = validator
+
+    if missing:
+        options: Dict[str, List[QuestionOption]] = {uuid: [] for uuid in missing}
+        for option in (
+            db.session.query(QuestionOption)
+            .options(joinedload(QuestionOption.question_option_type))
+            .filter(QuestionOption.question_id.in_(missing.keys()))
+        ):
+            options[option.question_id].append(option)
+
+        for uuid, question in missing.items():
+            validator = QuestionValidator(
+                uuid, question.question_type.value, options[uuid]
+            )
+            _validators.set(_cache_key(question), validator)
+            validators[uuid] = validator
+
+    return validators
+
+
+def clear_validators() -> None:
+    _validators.clear()
+
+
+def _cache_key(question: Question) -> Tuple[str, str]:
+    return question.uuid, question.modified.isoformat()
+
+
+def _parse_float(value: str) -> Optional[float]:
+    try:
+        return float(value)
+    except ValueError:
+        logger.info("Could not parse float '%s'", value)
+        return None
+
+
+def _parse_int(value: str) -> Optional[int]:
+    try:
+        return int(value)
+    except ValueError:
+        logger.info("Could not parse integer '%s'", value)
+        return None
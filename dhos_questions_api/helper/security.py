@@ -1,6 +1,8 @@
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 import connexion
+from flask import abort, g, has_request_context
+from sqlalchemy.orm import joinedload
 
 from dhos_questions_api.models.survey import Survey
 
@@ -15,33 +17,38 @@ def survey_by_uuid_protection(
 
         survey_uuid = params.get("survey_uuid")
         if survey_uuid:
-            return survey_matches_user(jwt_claims, survey_uuid, user_id, user_type)
+            survey_uuids: List[Optional[str]] = [survey_uuid]
         else:
-            if not survey_uuid:
-                request = connexion.request.get_json()
-                if not request:
-                    return False
-
-                if type(request) == list:
-                    for answer in request:
-                        survey_uuid = answer.get("survey_uuid")
-                        if (
-                            survey_matches_user(
-                                jwt_claims, survey_uuid, user_id, user_type
-                            )
-                            is False
-                        ):
-                            return False
-                else:
-                    survey_uuid = request.get("survey_uuid")
-                    return survey_matches_user(
-                        jwt_claims, survey_uuid, user_id, user_type
-                    )
+            request = connexion.request.get_json()
+            if not request:
+                return False
+
+            # Answers refer to their survey as survey_id, but survey_uuid is still
+            # accepted for older clients.
+            payloads: List[Dict] = request if type(request) == list else [request]
+            survey_uuids = [
+                payload.get("survey_id") or payload.get("survey_uuid")
+                for payload in payloads
+            ]
+
+        return surveys_match_user(survey_uuids, user_id, user_type)
 
     except (AttributeError, ValueError):
         return False
 
-    return True
+
+def survey_user_protection(
+    jwt_claims: Dict, claims_map: Optional[Dict], **params: Any
+) -> bool:
+    """
+    Allows users to list surveys only when filtering on their own user_id and
+    user_type.
+    """
+    user_type, user_id = get_user_type_and_id(jwt_claims)
+    if user_type is False:
+        return False
+
+    return params.get("user_id") == user_id and params.get("user_type") == user_type
 
 
 def get_user_type_and_id(jwt_claims: Dict) -> Tuple:
@@ -56,15 +63,56 @@ def get_user_type_and_id(jwt_claims: Dict) -> Tuple:
     return user_type, user_id
 
 
-def survey_matches_user(
-    jwt_claims: Dict, survey_uuid: str, user_id: str, user_type: str
+def surveys_match_user(
+    survey_uuids: List[Optional[str]], user_id: str, user_type: str
 ) -> bool:
-    survey = Survey.query.filter_by(uuid=survey_uuid).first_or_404()
+    surveys: Dict[str, Survey] = load_surveys(
+        survey_uuid for survey_uuid in survey_uuids if survey_uuid is not None
+    )
+    for survey_uuid in survey_uuids:
+        survey: Optional[Survey] = surveys.get(survey_uuid) if survey_uuid else None
+        if survey is None:
+            abort(404)
 
-    if survey.user_type != user_type:
-        return False
+        if survey.user_type != user_type:
+            return False
 
-    if survey.user_id != user_id:
-        return False
+        if survey.user_id != user_id:
+            return False
 
     return True
+
+
+def load_surveys(survey_uuids: Iterable[str]) -> Dict[str, Survey]:
+    """
+    Loads surveys by UUID in a single query, returning those that exist keyed by
+    UUID, with their groups so they can be serialised without further queries.
+    During a request the surveys are remembered, so that the ownership checks and
+    the controllers share one lookup.
+    """
+    wanted = set(survey_uuids)
+    memo: Dict[str, Optional[Survey]] = (
+        g.setdefault("surveys", {}) if has_request_context() else {}
+    )
+    missing = wanted - memo.keys()
+    if missing:
+        found: Dict[str, Survey] = {
+            survey.uuid: survey
+            for survey in Survey.query.options(joinedload(Survey.group)).filter(
+                Survey.uuid.in_(missing)
+            )
+        }
+        memo.update({survey_uuid: found.get(survey_uuid) for survey_uuid in missing})
+    return {
+        survey_uuid: survey
+        for survey_uuid in wanted
+        if (survey := memo[survey_uuid]) is not None
+    }
+
+
+def forget_surveys(_error: Optional[BaseException] = None) -> None:
+    """
+    Drops the surveys remembered during a request, as the application context (and
+    so flask.g) can outlive a request, for example in the tests.
+    """
+    g.pop("surveys", None)
@@ -1,8 +1,13 @@
 from datetime import datetime
-from typing import Any, Dict
+from typing import Any, Collection, Dict, List, Optional
 
 from flask_batteries_included.sqldb import ModelIdentifier, db
 
+from dhos_questions_api.helper.fields import (
+    IDENTIFIER_COLUMNS,
+    field_selector,
+    pack_identifier_fields,
+)
 from dhos_questions_api.queries.softdelete import QueryWithSoftDelete
 
 
@@ -23,11 +28,29 @@ class Answer(ModelIdentifier, db.Model):
             value,
             unique=True,
             postgresql_where=db.text("deleted IS NULL"),
+            sqlite_where=db.text("deleted IS NULL"),
+        ),
+        # Not partial, as the answer change feed includes deleted answers.
+        db.Index("answer_modified_uuid", "modified", "uuid"),
+        db.Index(
+            "answer_question_id",
+            question_id,
+            postgresql_where=db.text("deleted IS NULL"),
         ),
     )
 
     deleted = db.Column(db.DateTime, unique=False, nullable=True)
 
+    # The columns needed for each field that can be asked for with ?fields=
+    FIELD_COLUMNS: Dict[str, List[str]] = {
+        **IDENTIFIER_COLUMNS,
+        "survey_id": ["survey_id"],
+        "question_id": ["question_id"],
+        "value": ["value"],
+        "text": ["text"],
+        "deleted": ["deleted"],
+    }
+
     @staticmethod
     def schema() -> Dict:
         return {
@@ -36,17 +59,18 @@ class Answer(ModelIdentifier, db.Model):
             "updatable": {"value": str, "text": str},
         }
 
-    def to_dict(self) -> Dict:
+    def to_dict(self, fields: Optional[Collection[str]] = None) -> Dict:
+        wanted = field_selector(fields)
         answer = {
-            "survey_id": self.survey_id,
-            "question_id": self.question_id,
-            "value": self.value,
+            key: getattr(self, key)
+            for key in ["survey_id", "question_id", "value"]
+            if wanted(key)
         }
-        if self.text is not None:
+        if wanted("text") and self.text is not None:
             answer["text"] = self.text
-        if self.deleted is not None:
+        if wanted("deleted") and self.deleted is not None:
             answer["deleted"] = self.deleted
-        return {**answer, **self.pack_identifier()}
+        return {**answer, **pack_identifier_fields(self, fields)}
 
     def delete(self) -> None:
         self.deleted = datetime.utcnow()
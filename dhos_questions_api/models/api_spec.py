@@ -10,6 +10,7 @@ from flask_batteries_included.helpers.apispec import (
     openapi_schema,
 )
 from marshmallow import EXCLUDE, Schema, fields
+from marshmallow.validate import OneOf
 
 dhos_questions_api_spec: APISpec = APISpec(
     version="1.0.0",
@@ -334,6 +335,11 @@ class AnswerResponse(AnswerSchema, Identifier):
         example="2019-01-01T00:00:00.000Z",
         required=False,
     )
+    duplicate = fields.Boolean(
+        description="Set when a submitted answer was identical to this existing answer and was not stored again",
+        example=True,
+        required=False,
+    )
 
 
 @openapi_schema(dhos_questions_api_spec)
@@ -373,3 +379,119 @@ class AnswerUpdateRequest(Schema):
         required=False,
         allow_none=True,
     )
+
+
+@openapi_schema(dhos_questions_api_spec)
+class SurveySearchRequest(Schema):
+    class Meta:
+        title = "Survey search request"
+        unknown = EXCLUDE
+        ordered = True
+
+        class Dict(TypedDict, total=False):
+            uuids: List[str]
+
+    uuids = fields.List(
+        fields.String(),
+        description="The survey UUIDs",
+        example=["18439f36-ffa9-42ae-90de-0beda299cd37"],
+        required=True,
+    )
+
+
+@openapi_schema(dhos_questions_api_spec)
+class SurveyWithAnswersResponse(SurveyResponse):
+    class Meta:
+        title = "Survey with answers response"
+        unknown = EXCLUDE
+        ordered = True
+
+    answers = fields.List(fields.Nested(AnswerResponse), required=True)
+
+
+@openapi_schema(dhos_questions_api_spec)
+class SurveyBundleResponse(Schema):
+    class Meta:
+        title = "Survey bundle response"
+        unknown = EXCLUDE
+        ordered = True
+
+    survey = fields.Nested(SurveyResponse, required=True)
+    questions = fields.List(fields.Nested(QuestionResponse), required=True)
+    answers = fields.List(fields.Nested(AnswerResponse), required=True)
+
+
+class SurveyResponsesJobSchema(Schema):
+    class Meta:
+        title = "Survey responses export job fields"
+        unknown = EXCLUDE
+        ordered = True
+
+        class Dict(TypedDict, total=False):
+            start_date: str
+            end_date: str
+            format: str
+            layout: str
+
+    start_date = fields.Date(
+        description="Start date of survey answers",
+        example="2020-03-01",
+        required=False,
+        allow_none=True,
+    )
+    end_date = fields.Date(
+        description="End date of survey answers",
+        example="2020-04-01",
+        required=False,
+        allow_none=True,
+    )
+    format = fields.String(
+        description="Format of the file, csv or parquet",
+        example="csv",
+        required=False,
+        validate=OneOf(["csv", "parquet"]),
+    )
+    layout = fields.String(
+        description="One row per answer (long) or one row per survey (wide, CSV only)",
+        example="long",
+        required=False,
+        validate=OneOf(["long", "wide"]),
+    )
+
+
+@openapi_schema(dhos_questions_api_spec)
+class SurveyResponsesJobRequest(SurveyResponsesJobSchema):
+    class Meta:
+        title = "Survey responses export job request"
+        unknown = EXCLUDE
+        ordered = True
+
+
+@openapi_schema(dhos_questions_api_spec)
+class SurveyResponsesJobResponse(SurveyResponsesJobSchema):
+    class Meta:
+        title = "Survey responses export job response"
+        unknown = EXCLUDE
+        ordered = True
+
+        class Dict(TypedDict, SurveyResponsesJobSchema.Meta.Dict, total=False):
+            job_id: str
+            status: str
+            size: int
+
+    job_id = fields.String(
+        description="The export job identifier",
+        example="9f86d081884c7d659a2feaa0c55ad015a3bf4f1b2b0b822cd15d6c15b0f00a08",
+        required=True,
+    )
+    status = fields.String(
+        description="Whether the export is running, complete or failed",
+        example="complete",
+        required=True,
+        validate=OneOf(["running", "complete", "failed"]),
+    )
+    size = fields.Integer(
+        description="Size of the export file in bytes, once the export is complete",
+        example=1024,
+        required=False,
+    )
@@ -13,6 +13,10 @@ class Group(ModelIdentifier, db.Model):
 
     deleted = db.Column(db.DateTime, unique=False, nullable=True)
 
+    __table_args__ = (
+        db.Index("group_group", "group", postgresql_where=db.text("deleted IS NULL")),
+    )
+
     def to_dict(self) -> Dict:
         group = {"group": self.group}
         if self.deleted is not None:
@@ -28,6 +28,8 @@ class Question(ModelIdentifier, db.Model):
         ),
         db.Column("group_id", db.String, db.ForeignKey("group.uuid"), nullable=False),
         db.PrimaryKeyConstraint("question_id", "group_id"),
+        # The primary key only helps lookups by question.
+        db.Index("question_group_group_id", "group_id"),
     )
 
     groups = db.relationship(
@@ -1,9 +1,14 @@
 from datetime import datetime
-from typing import Dict
+from typing import Collection, Dict, List, Optional
 
 from flask_batteries_included.helpers.timestamp import join_timestamp
 from flask_batteries_included.sqldb import ModelIdentifier, db
 
+from dhos_questions_api.helper.fields import (
+    IDENTIFIER_COLUMNS,
+    field_selector,
+    pack_identifier_fields,
+)
 from dhos_questions_api.queries.softdelete import QueryWithSoftDelete
 
 
@@ -24,6 +29,35 @@ class Survey(ModelIdentifier, db.Model):
 
     deleted = db.Column(db.DateTime, unique=False, nullable=True)
 
+    __table_args__ = (
+        db.Index(
+            "survey_modified_uuid",
+            "modified",
+            "uuid",
+            postgresql_where=db.text("deleted IS NULL"),
+        ),
+        # Lists a user's surveys a page at a time.
+        db.Index(
+            "survey_user_modified_uuid",
+            "user_id",
+            "user_type",
+            "modified",
+            "uuid",
+            postgresql_where=db.text("deleted IS NULL"),
+        ),
+    )
+
+    # The columns needed for each field that can be asked for with ?fields=
+    FIELD_COLUMNS: Dict[str, List[str]] = {
+        **IDENTIFIER_COLUMNS,
+        "user_type": ["user_type"],
+        "user_id": ["user_id"],
+        "group": ["group_id"],
+        "completed": ["completed", "completed_tz"],
+        "declined": ["declined", "declined_tz"],
+        "deleted": ["deleted"],
+    }
+
     @staticmethod
     def schema() -> Dict:
         return {
@@ -32,23 +66,24 @@ class Survey(ModelIdentifier, db.Model):
             "updatable": {"completed": list, "declined": list},
         }
 
-    def to_dict(self) -> Dict:
+    def to_dict(self, fields: Optional[Collection[str]] = None) -> Dict:
+        wanted = field_selector(fields)
         survey = {
-            "user_type": self.user_type,
-            "user_id": self.user_id,
-            "group": self.group.to_dict(),
+            key: getattr(self, key) for key in ["user_type", "user_id"] if wanted(key)
         }
+        if wanted("group"):
+            survey["group"] = self.group.to_dict()
 
         for key in ["completed", "declined"]:
-            ts = getattr(self, key)
+            ts = getattr(self, key) if wanted(key) else None
             if ts is not None:
                 value = join_timestamp(ts, getattr(self, f"{key}_tz"))
                 survey[key] = value
 
-        if self.deleted is not None:
+        if wanted("deleted") and self.deleted is not None:
             survey["deleted"] = self.deleted
 
-        return {**survey, **self.pack_identifier()}
+        return {**survey, **pack_identifier_fields(self, fields)}
 
     def delete(self) -> None:
         self.deleted = datetime.utcnow()
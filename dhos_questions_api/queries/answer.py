@@ -0,0 +1,42 @@
+from datetime import datetime
+from typing import Optional, Set
+
+from dhos_questions_api.helper.fields import load_fields
+from dhos_questions_api.models.answer import Answer
+from dhos_questions_api.queries.softdelete import QueryWithSoftDelete
+
+
+def query_answers(
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    fields: Optional[Set[str]] = None,
+) -> QueryWithSoftDelete:
+    """
+    Query for the active answers modified between two dates, loading only the
+    columns behind the requested fields.
+    """
+    q: QueryWithSoftDelete = load_fields(Answer.query, Answer, fields)
+    if start_date:
+        q = q.filter(Answer.modified >= start_date)
+    if end_date:
+        q = q.filter(Answer.modified <= end_date)
+    return q
+
+
+def query_answer_changes(
+    settled: datetime, fields: Optional[Set[str]] = None
+) -> QueryWithSoftDelete:
+    """
+    Query for the answers modified up to the settled time, including deleted ones.
+    """
+    return load_fields(Answer.query.with_deleted(), Answer, fields).filter(
+        Answer.modified <= settled
+    )
+
+
+def query_answers_by_survey_uuid(
+    survey_uuid: str, fields: Optional[Set[str]] = None
+) -> QueryWithSoftDelete:
+    return load_fields(Answer.query, Answer, fields).filter(
+        Answer.survey_id == survey_uuid
+    )
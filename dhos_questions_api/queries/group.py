@@ -0,0 +1,6 @@
+from dhos_questions_api.models.group import Group
+from dhos_questions_api.queries.softdelete import QueryWithSoftDelete
+
+
+def query_group_by_name(group: str) -> QueryWithSoftDelete:
+    return Group.query.filter_by(group=group)
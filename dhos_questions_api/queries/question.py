@@ -0,0 +1,27 @@
+from sqlalchemy.orm import joinedload, selectinload
+
+from dhos_questions_api.models.group import Group
+from dhos_questions_api.models.question import Question
+from dhos_questions_api.models.question_option import QuestionOption
+from dhos_questions_api.queries.softdelete import QueryWithSoftDelete
+
+
+def query_questions_with_details() -> QueryWithSoftDelete:
+    """
+    Query for questions that loads everything used by Question.to_dict() up front: the
+    question type is joined and the options (with their types) and groups are each
+    loaded with one extra SELECT ... IN query, however many questions are returned.
+    """
+    return Question.query.options(
+        joinedload(Question.question_type),
+        selectinload(Question.question_options).joinedload(
+            QuestionOption.question_option_type
+        ),
+        selectinload(Question.groups),
+    )
+
+
+def query_questions_by_group_uuid(group_uuid: str) -> QueryWithSoftDelete:
+    return query_questions_with_details().filter(
+        Question.groups.any(Group.uuid == group_uuid)
+    )
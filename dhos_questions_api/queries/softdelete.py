@@ -1,4 +1,4 @@
-from typing import Any, Optional, Type
+from typing import Any
 
 from flask_batteries_included.sqldb import db
 from flask_sqlalchemy import BaseQuery
@@ -16,9 +16,9 @@ class QueryWithSoftDelete(BaseQuery):
     def __init__(self, *args: Any, **kwargs: Any) -> None:
         pass
 
-    def with_deleted(self) -> Optional[Type["QueryWithSoftDelete"]]:
+    def with_deleted(self) -> "QueryWithSoftDelete":
         return self.__class__(
-            db.class_mapper(self._mapper_zero().class_),
+            self._only_full_mapper_zero("with_deleted"),
             session=db.session(),
             _with_deleted=True,
         )
@@ -0,0 +1,36 @@
+from typing import Optional, Set
+
+from sqlalchemy.orm import joinedload
+
+from dhos_questions_api.helper.fields import load_fields
+from dhos_questions_api.models.survey import Survey
+from dhos_questions_api.queries.softdelete import QueryWithSoftDelete
+
+
+def query_surveys(
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    user_id: Optional[str] = None,
+    user_type: Optional[str] = None,
+    pending: bool = False,
+    fields: Optional[Set[str]] = None,
+) -> QueryWithSoftDelete:
+    """
+    Query for the active surveys matching the filters, loading only the columns
+    behind the requested fields. The group is joined unless it is left out.
+    """
+    q: QueryWithSoftDelete = load_fields(Survey.query, Survey, fields)
+    if fields is None or "group" in fields:
+        q = q.options(joinedload(Survey.group))
+
+    if start_date:
+        q = q.filter(Survey.modified >= start_date)
+    if end_date:
+        q = q.filter(Survey.modified <= end_date)
+    if user_id is not None:
+        q = q.filter(Survey.user_id == user_id)
+    if user_type is not None:
+        q = q.filter(Survey.user_type == user_type)
+    if pending:
+        q = q.filter(Survey.completed.is_(None), Survey.declined.is_(None))
+    return q
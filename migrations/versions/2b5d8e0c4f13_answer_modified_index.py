@@ -0,0 +1,28 @@
+"""answer modified index
+
+Revision ID: 2b5d8e0c4f13
+Revises: efa0d1640725
+Create Date: 2026-10-18 09:12:04.118211
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '2b5d8e0c4f13'
+down_revision = 'efa0d1640725'
+branch_labels = None
+depends_on = None
+
+
+# The index is created concurrently so that answers can still be written while it
+# is built. CREATE INDEX CONCURRENTLY can't run inside a transaction. It is not
+# partial, as the answer change feed pages through deleted answers too.
+def upgrade():
+    with op.get_context().autocommit_block():
+        op.create_index('answer_modified_uuid', 'answer', ['modified', 'uuid'], unique=False, postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('answer_modified_uuid', table_name='answer', postgresql_concurrently=True)
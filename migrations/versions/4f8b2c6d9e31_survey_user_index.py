@@ -0,0 +1,29 @@
+"""survey user index
+
+Revision ID: 4f8b2c6d9e31
+Revises: c3d7e1f0a492
+Create Date: 2026-10-18 10:41:09.265480
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4f8b2c6d9e31'
+down_revision = 'c3d7e1f0a492'
+branch_labels = None
+depends_on = None
+
+
+# Serves both the filter on a user's surveys and their ordering by modified time,
+# so that they can be paged through. Created concurrently, as in the lookup
+# indexes migration.
+def upgrade():
+    with op.get_context().autocommit_block():
+        op.create_index('survey_user_modified_uuid', 'survey', ['user_id', 'user_type', 'modified', 'uuid'], unique=False, postgresql_where=sa.text('deleted IS NULL'), postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('survey_user_modified_uuid', table_name='survey', postgresql_concurrently=True)
@@ -0,0 +1,28 @@
+"""survey modified index
+
+Revision ID: 6e1f3a9b7d20
+Revises: 2b5d8e0c4f13
+Create Date: 2026-10-18 09:47:31.502874
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6e1f3a9b7d20'
+down_revision = '2b5d8e0c4f13'
+branch_labels = None
+depends_on = None
+
+
+# The index is created concurrently so that surveys can still be written while it
+# is built. CREATE INDEX CONCURRENTLY can't run inside a transaction.
+def upgrade():
+    with op.get_context().autocommit_block():
+        op.create_index('survey_modified_uuid', 'survey', ['modified', 'uuid'], unique=False, postgresql_where=sa.text('deleted IS NULL'), postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('survey_modified_uuid', table_name='survey', postgresql_concurrently=True)
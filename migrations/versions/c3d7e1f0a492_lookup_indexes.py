@@ -0,0 +1,32 @@
+"""lookup indexes
+
+Revision ID: c3d7e1f0a492
+Revises: 6e1f3a9b7d20
+Create Date: 2026-10-18 10:04:21.733905
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3d7e1f0a492'
+down_revision = '6e1f3a9b7d20'
+branch_labels = None
+depends_on = None
+
+
+# The indexes are created concurrently so that the tables can still be written to
+# while they are built. CREATE INDEX CONCURRENTLY can't run inside a transaction.
+def upgrade():
+    with op.get_context().autocommit_block():
+        op.create_index('answer_question_id', 'answer', ['question_id'], unique=False, postgresql_where=sa.text('deleted IS NULL'), postgresql_concurrently=True)
+        op.create_index('group_group', 'group', ['group'], unique=False, postgresql_where=sa.text('deleted IS NULL'), postgresql_concurrently=True)
+        op.create_index('question_group_group_id', 'question_group', ['group_id'], unique=False, postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('question_group_group_id', table_name='question_group', postgresql_concurrently=True)
+        op.drop_index('group_group', table_name='group', postgresql_concurrently=True)
+        op.drop_index('answer_question_id', table_name='answer', postgresql_concurrently=True)
@@ -1,3 +1,4 @@
+from pathlib import Path
 from typing import Any, Dict, Generator, List, Tuple
 
 import pytest
@@ -6,12 +7,14 @@ from flask_batteries_included.sqldb import db
 from mock import Mock
 from pytest_dhos.jwt_permissions import GDM_CLINICIAN_PERMISSIONS
 from pytest_mock import MockFixture
+from sqlalchemy import event
 
 from dhos_questions_api.controllers import (
     answer_controller,
     question_controller,
     survey_controller,
 )
+from dhos_questions_api.helper.export_jobs import ExportJobs, init_export_jobs
 from dhos_questions_api.models.group import Group
 from dhos_questions_api.models.question_option_type import QuestionOptionType
 from dhos_questions_api.models.question_type import QuestionType
@@ -75,6 +78,34 @@ def mock_bearer_validation(mocker: MockFixture) -> Mock:
     return mocked
 
 
+@pytest.fixture
+def sql_statements(app_context: Any) -> Generator[List[str], None, None]:
+    """Fixture that records the SQL statements executed while it is active"""
+    statements: List[str] = []
+
+    def before_cursor_execute(
+        conn: Any,
+        cursor: Any,
+        statement: str,
+        parameters: Any,
+        context: Any,
+        executemany: bool,
+    ) -> None:
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+    yield statements
+    event.remove(db.engine, "before_cursor_execute", before_cursor_execute)
+
+
+@pytest.fixture
+def export_jobs(app: Flask, tmp_path: Path) -> ExportJobs:
+    """Keeps the files written by export jobs in a temporary directory"""
+    app.config["EXPORT_JOB_DIR"] = str(tmp_path)
+    init_export_jobs(app)
+    return app.extensions["export_jobs"]
+
+
 @pytest.fixture
 def question_types() -> List[QuestionType]:
     question_types = []
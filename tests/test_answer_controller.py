@@ -1,10 +1,15 @@
 from datetime import datetime, timedelta
-from typing import Dict
+from typing import Dict, List
+from unittest.mock import patch
 
 import pytest
+from flask import Flask
 from flask.testing import FlaskClient
+from flask_batteries_included.sqldb import db
+from werkzeug.exceptions import Conflict
 
-from dhos_questions_api.controllers import question_controller
+from dhos_questions_api.controllers import answer_controller, question_controller
+from dhos_questions_api.models.answer import Answer
 
 
 @pytest.mark.usefixtures(
@@ -60,6 +65,163 @@ class TestAnswerController:
         assert len(response.json) == 1
         assert response.json[0]["uuid"] == answer_good["uuid"]
 
+    def test_get_answers_paginated(self, client: FlaskClient, survey: Dict) -> None:
+        multi_question = question_controller.create_question(
+            {
+                "question": "Which would you like?",
+                "question_type": {"value": 6},
+                "question_options": [
+                    {"value": str(value), "question_option_type": 0}
+                    for value in range(5)
+                ],
+                "groups": [{"group": "feedback1"}],
+            }
+        )
+        # Answers created together can share a modified timestamp.
+        client.post(
+            "/dhos/v1/answer",
+            json=[
+                {
+                    "question_id": multi_question["uuid"],
+                    "survey_id": survey["uuid"],
+                    "value": str(value),
+                }
+                for value in range(5)
+            ],
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+
+        pages: List[List[Dict]] = []
+        url = "/dhos/v1/answer?limit=2"
+        while True:
+            response = client.get(url, headers={"Authorization": "Bearer TOKEN"})
+            assert response.status_code == 200
+            assert response.json is not None
+            pages.append(response.json)
+            if "X-Next-Cursor" not in response.headers:
+                break
+            url = f"/dhos/v1/answer?limit=2&cursor={response.headers['X-Next-Cursor']}"
+
+        assert [len(page) for page in pages] == [2, 2, 1]
+        uuids = [answer["uuid"] for page in pages for answer in page]
+        unpaged = client.get(
+            "/dhos/v1/answer", headers={"Authorization": "Bearer TOKEN"}
+        )
+        assert unpaged.json is not None
+        assert "X-Next-Cursor" not in unpaged.headers
+        assert uuids == [answer["uuid"] for answer in unpaged.json]
+        assert sorted(uuids) == sorted(set(uuids))
+
+    def test_get_answers_with_fields(
+        self, client: FlaskClient, answer_good: Dict, sql_statements: List[str]
+    ) -> None:
+        response = client.get(
+            "/dhos/v1/answer?fields=value,survey_id",
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 200
+        assert response.json == [
+            {"value": answer_good["value"], "survey_id": answer_good["survey_id"]}
+        ]
+        # Only the requested columns are selected, and nothing is loaded afterwards.
+        answer_queries = [s for s in sql_statements if "FROM answer" in s]
+        assert len(answer_queries) == 1
+        assert "answer.value" in answer_queries[0]
+        assert "answer.created_by_" not in answer_queries[0]
+        assert "answer.question_id" not in answer_queries[0]
+
+    @pytest.mark.parametrize("fields", ["", "value,unknown"])
+    def test_get_answers_bad_fields(
+        self, client: FlaskClient, answer_good: Dict, fields: str
+    ) -> None:
+        response = client.get(
+            f"/dhos/v1/answer?fields={fields}",
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 400
+
+    @pytest.mark.parametrize("query", ["limit=0", "limit=1001", "limit=1&cursor=xyz"])
+    def test_get_answers_bad_page(
+        self, client: FlaskClient, answer_good: Dict, query: str
+    ) -> None:
+        response = client.get(
+            f"/dhos/v1/answer?{query}", headers={"Authorization": "Bearer TOKEN"}
+        )
+        assert response.status_code == 400
+
+    def test_get_answer_changes(
+        self, app: Flask, client: FlaskClient, survey: Dict
+    ) -> None:
+        app.config["CHANGE_FEED_DELAY_SECONDS"] = 0
+        response = client.get(
+            "/dhos/v1/answer_changes", headers={"Authorization": "Bearer TOKEN"}
+        )
+        assert response.json == []
+        assert "X-Next-Cursor" not in response.headers
+
+        multi_question = question_controller.create_question(
+            {
+                "question": "Which would you like?",
+                "question_type": {"value": 6},
+                "question_options": [
+                    {"value": value, "question_option_type": 0} for value in "ab"
+                ],
+                "groups": [{"group": "feedback1"}],
+            }
+        )
+        first, second = answer_controller.create_answers(
+            [
+                {
+                    "question_id": multi_question["uuid"],
+                    "survey_id": survey["uuid"],
+                    "value": value,
+                }
+                for value in "ab"
+            ]
+        )
+        response = client.get(
+            "/dhos/v1/answer_changes?limit=1", headers={"Authorization": "Bearer TOKEN"}
+        )
+        assert response.json is not None
+        uuids: List[str] = [answer["uuid"] for answer in response.json]
+        cursor: str = response.headers["X-Next-Cursor"]
+        response = client.get(
+            f"/dhos/v1/answer_changes?cursor={cursor}",
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.json is not None
+        uuids += [answer["uuid"] for answer in response.json]
+        assert sorted(uuids) == sorted([first["uuid"], second["uuid"]])
+        cursor = response.headers["X-Next-Cursor"]
+
+        # With no further changes the same cursor is given back to try again later.
+        response = client.get(
+            f"/dhos/v1/answer_changes?cursor={cursor}",
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.json == []
+        assert response.headers["X-Next-Cursor"] == cursor
+
+        # Deleted answers are included, so that consumers can remove them.
+        answer = Answer.query.filter_by(uuid=first["uuid"]).one()
+        answer.delete()
+        db.session.commit()
+        response = client.get(
+            f"/dhos/v1/answer_changes?cursor={cursor}",
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.json is not None
+        assert [answer["uuid"] for answer in response.json] == [first["uuid"]]
+        assert response.json[0]["deleted"] is not None
+
+    def test_get_answer_changes_settling(
+        self, client: FlaskClient, answer_good: Dict
+    ) -> None:
+        response = client.get(
+            "/dhos/v1/answer_changes", headers={"Authorization": "Bearer TOKEN"}
+        )
+        assert response.json == []
+
     def test_get_answers_by_date(self, client: FlaskClient, answer_good: Dict) -> None:
         start_date = (datetime.utcnow() - timedelta(days=1)).isoformat(
             timespec="milliseconds"
@@ -361,3 +523,217 @@ class TestAnswerController:
             "/dhos/v1/answer", json=answers, headers={"Authorization": "Bearer TOKEN"}
         )
         assert response.status_code == 200
+
+    def test_create_answers_validation_query_count(
+        self, client: FlaskClient, survey: Dict, sql_statements: List[str]
+    ) -> None:
+        questions = [
+            question_controller.create_question(
+                {
+                    "question": f"Question {i}",
+                    "question_type": {"value": 3},
+                    "question_options": [
+                        {"text": "Yes", "value": "1", "question_option_type": 0},
+                        {"text": "No", "value": "0", "question_option_type": 0},
+                    ],
+                    "groups": [{"group": "feedback1"}],
+                }
+            )
+            for i in range(6)
+        ]
+
+        sql_statements.clear()
+        response = client.post(
+            f"/dhos/v1/survey/{survey['uuid']}/answer",
+            json=[{"question_id": questions[0]["uuid"], "value": "1"}],
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 200
+        single_answer_validation = _statements_before_insert(sql_statements)
+
+        sql_statements.clear()
+        response = client.post(
+            f"/dhos/v1/survey/{survey['uuid']}/answer",
+            json=[{"question_id": q["uuid"], "value": "0"} for q in questions[1:]],
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 200
+        many_answer_validation = _statements_before_insert(sql_statements)
+
+        assert len(many_answer_validation) == len(single_answer_validation)
+
+    def test_create_answers_already_answered(
+        self, client: FlaskClient, survey: Dict, question_good: Dict, answer_good: Dict
+    ) -> None:
+        answer = [
+            {
+                "question_id": question_good["uuid"],
+                "survey_id": survey["uuid"],
+                "value": "A different answer",
+            }
+        ]
+        response = client.post(
+            "/dhos/v1/answer", json=answer, headers={"Authorization": "Bearer TOKEN"}
+        )
+        assert response.status_code == 400
+
+    def test_create_answers_single_insert(
+        self, client: FlaskClient, survey: Dict, sql_statements: List[str]
+    ) -> None:
+        multi_question = question_controller.create_question(
+            {
+                "question": "How many would you like?",
+                "question_type": {"value": 6},
+                "question_options": [
+                    {"text": "One", "value": "1", "question_option_type": 0},
+                    {"text": "Two", "value": "2", "question_option_type": 0},
+                    {"text": "Three", "value": "3", "question_option_type": 0},
+                ],
+                "groups": [{"group": "feedback1"}],
+            }
+        )
+        answers = [
+            {
+                "question_id": multi_question["uuid"],
+                "survey_id": survey["uuid"],
+                "value": value,
+                "text": text,
+            }
+            for value, text in [("1", "One"), ("3", "Three")]
+        ]
+
+        sql_statements.clear()
+        response = client.post(
+            "/dhos/v1/answer", json=answers, headers={"Authorization": "Bearer TOKEN"}
+        )
+        assert response.status_code == 200
+        inserts = [s for s in sql_statements if s.startswith("INSERT")]
+        assert len(inserts) == 1
+        after_insert = sql_statements[sql_statements.index(inserts[0]) + 1 :]
+        assert not [s for s in after_insert if s.startswith("SELECT")]
+
+        assert response.json is not None
+        assert [a["value"] for a in response.json] == ["1", "3"]
+        assert [a["text"] for a in response.json] == ["One", "Three"]
+        for answer in response.json:
+            assert answer["uuid"]
+            assert answer["created"] is not None
+            assert answer["modified"] is not None
+
+        stored = client.get(
+            f"/dhos/v1/survey/{survey['uuid']}/answer",
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert stored.json is not None
+        assert {a["uuid"] for a in stored.json} == {a["uuid"] for a in response.json}
+
+    def test_create_answers_skip_duplicates(
+        self, client: FlaskClient, survey: Dict
+    ) -> None:
+        multi_question = question_controller.create_question(
+            {
+                "question": "How many would you like?",
+                "question_type": {"value": 2},
+                "question_options": [
+                    {"text": "One", "value": "1", "question_option_type": 0},
+                    {"text": "Two", "value": "2", "question_option_type": 0},
+                ],
+                "groups": [{"group": "feedback1"}],
+            }
+        )
+        first = [{"question_id": multi_question["uuid"], "value": "1"}]
+        response = client.post(
+            f"/dhos/v1/survey/{survey['uuid']}/answer?on_conflict=skip",
+            json=first,
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 200
+        assert response.json is not None
+        existing_uuid = response.json[0]["uuid"]
+        assert "duplicate" not in response.json[0]
+
+        response = client.post(
+            f"/dhos/v1/survey/{survey['uuid']}/answer?on_conflict=skip",
+            json=first,
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 200
+        assert response.json is not None
+        assert len(response.json) == 1
+        assert response.json[0]["uuid"] == existing_uuid
+        assert response.json[0]["duplicate"] is True
+
+        # Only exact duplicates are skipped, so a multiple answer question that has
+        # already been answered can't have answers added to it.
+        for changed in (
+            [{"question_id": multi_question["uuid"], "value": "2"}],
+            first + [{"question_id": multi_question["uuid"], "value": "2"}],
+        ):
+            response = client.post(
+                f"/dhos/v1/survey/{survey['uuid']}/answer?on_conflict=skip",
+                json=changed,
+                headers={"Authorization": "Bearer TOKEN"},
+            )
+            assert response.status_code == 400
+        assert [
+            answer.value for answer in Answer.query.filter_by(survey_id=survey["uuid"])
+        ] == ["1"]
+
+    def test_create_answers_duplicate_without_skip(
+        self, client: FlaskClient, survey: Dict, answer_good: Dict
+    ) -> None:
+        answer = [
+            {
+                "question_id": answer_good["question_id"],
+                "survey_id": survey["uuid"],
+                "value": answer_good["value"],
+            }
+        ]
+        response = client.post(
+            "/dhos/v1/answer?on_conflict=error",
+            json=answer,
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 400
+
+        response = client.post(
+            "/dhos/v1/answer?on_conflict=skip",
+            json=answer,
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 200
+        assert response.json is not None
+        assert response.json[0]["uuid"] == answer_good["uuid"]
+        assert response.json[0]["duplicate"] is True
+
+    def test_create_answers_skip_duplicates_already_answered(
+        self, client: FlaskClient, survey: Dict, answer_good: Dict
+    ) -> None:
+        # Skipping duplicates still allows only one answer to a single answer question.
+        response = client.post(
+            "/dhos/v1/answer?on_conflict=skip",
+            json=[
+                {
+                    "question_id": answer_good["question_id"],
+                    "survey_id": survey["uuid"],
+                    "value": "A different answer",
+                }
+            ],
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 400
+
+    def test_create_answers_skip_duplicates_existing_answer_gone(
+        self, client: FlaskClient, survey: Dict, answer_good: Dict
+    ) -> None:
+        # The conflicting answer is deleted between the insert and looking it up.
+        with patch.object(Answer, "query") as query, pytest.raises(Conflict):
+            query.filter.return_value = []
+            answer_controller.insert_answers_skipping_duplicates(
+                [(survey["uuid"], answer_good)]
+            )
+
+
+def _statements_before_insert(statements: List[str]) -> List[str]:
+    inserts = [i for i, s in enumerate(statements) if s.startswith("INSERT")]
+    return statements[: inserts[0]] if inserts else statements
@@ -0,0 +1,169 @@
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import dhosredis
+import pytest
+from flask import Flask
+from prometheus_client import REGISTRY
+from pytest_mock import MockFixture
+from redis import SSLConnection
+
+from dhos_questions_api.controllers import question_controller
+from dhos_questions_api.helper.cache import LRUCache, RedisCache, create_cache
+from dhos_questions_api.helper.question_catalog import QuestionCatalog
+
+
+class FakeRedis:
+    """Just enough of the Redis client for the cache to use."""
+
+    def __init__(self) -> None:
+        self.values: Dict[str, str] = {}
+        self.expiry: Dict[str, Optional[int]] = {}
+
+    def get(self, key: str) -> Optional[str]:
+        return self.values.get(key)
+
+    def set(self, key: str, value: str, ex: Optional[int] = None) -> None:
+        self.values[key] = value
+        self.expiry[key] = ex
+
+    def delete(self, *keys: str) -> None:
+        for key in keys:
+            self.values.pop(key, None)
+
+    def scan_iter(self, match: str) -> Iterator[str]:
+        return iter([key for key in self.values if key.startswith(match[:-1])])
+
+
+class BrokenRedis(FakeRedis):
+    def get(self, key: str) -> Optional[str]:
+        raise ConnectionError("Redis is down")
+
+    def set(self, key: str, value: str, ex: Optional[int] = None) -> None:
+        raise ConnectionError("Redis is down")
+
+
+def _hits_and_misses(name: str) -> Tuple[float, float]:
+    hits = REGISTRY.get_sample_value(
+        "dhos_questions_api_cache_hits_total", {"cache": name}
+    )
+    misses = REGISTRY.get_sample_value(
+        "dhos_questions_api_cache_misses_total", {"cache": name}
+    )
+    return hits or 0, misses or 0
+
+
+class TestCache:
+    def test_lru_cache_evicts_least_recently_used(self) -> None:
+        lru = LRUCache(maxsize=2)
+        lru.set("a", 1)
+        lru.set("b", 2)
+        assert lru.get("a") == 1
+        lru.set("c", 3)
+        assert lru.get("b") is None
+        assert lru.get("a") == 1
+        assert lru.get("c") == 3
+
+    def test_lru_cache_expires_entries(self) -> None:
+        lru = LRUCache(maxsize=2)
+        lru.set("a", 1, ttl=0)
+        assert lru.get("a") is None
+        assert len(lru) == 0
+
+    def test_redis_cache_round_trip(self, app: Flask) -> None:
+        client = FakeRedis()
+        redis_cache = RedisCache(client, name="test", ttl=60)
+        redis_cache.set(("group", "abc"), [{"uuid": "q1", "value": 1}])
+        assert client.values == {
+            "dhos-questions-api:test:group:abc": '[{"uuid": "q1", "value": 1}]'
+        }
+        assert client.expiry == {"dhos-questions-api:test:group:abc": 60}
+        assert redis_cache.get(("group", "abc")) == [{"uuid": "q1", "value": 1}]
+        assert redis_cache.get(("group", "other")) is None
+
+    def test_redis_cache_clear_only_removes_own_keys(self, app: Flask) -> None:
+        client = FakeRedis()
+        client.set("AUTH0_JWKS", "{}")
+        redis_cache = RedisCache(client, name="test")
+        redis_cache.set("a", 1)
+        redis_cache.set("b", 2)
+        redis_cache.clear()
+        assert client.values == {"AUTH0_JWKS": "{}"}
+
+    def test_redis_cache_skips_expired_values(self, app: Flask) -> None:
+        client = FakeRedis()
+        RedisCache(client, name="test").set("a", 1, ttl=0)
+        assert client.values == {}
+
+    def test_redis_failure_is_a_miss(self, app: Flask) -> None:
+        redis_cache = RedisCache(BrokenRedis(), name="test")
+        redis_cache.set("a", 1)
+        assert redis_cache.get("a") is None
+
+    def test_hit_and_miss_counters(self, app: Flask) -> None:
+        lru = LRUCache(maxsize=2, name="counted")
+        hits, misses = _hits_and_misses("counted")
+        lru.get("a")
+        lru.set("a", 1)
+        lru.get("a")
+        lru.get("a")
+        assert _hits_and_misses("counted") == (hits + 2, misses + 1)
+
+    @pytest.mark.parametrize("redis_installed", [True, False])
+    def test_create_cache(
+        self, app: Flask, redis_installed: bool, mocker: MockFixture
+    ) -> None:
+        app.config["REDIS_INSTALLED"] = redis_installed
+        mocker.patch.dict(
+            dhosredis.config,
+            {
+                "REDIS_HOST": "localhost",
+                "REDIS_PORT": "6379",
+                "REDIS_PASSWORD": "secret",
+                "REDIS_TIMEOUT": 2,
+                "REDIS_USE_SSL": True,
+            },
+        )
+        created = create_cache(app, name="test", maxsize=10)
+        assert isinstance(created, RedisCache if redis_installed else LRUCache)
+        if isinstance(created, RedisCache):
+            pool = created.client.connection_pool
+            assert pool.connection_class is SSLConnection
+            assert pool.connection_kwargs["host"] == "localhost"
+
+    def test_replicas_share_catalog_and_invalidation(
+        self,
+        question_in_survey: Tuple[Dict, Dict],
+        sql_statements: List[str],
+        jwt_system: str,
+    ) -> None:
+        question, survey = question_in_survey
+        client = FakeRedis()
+
+        def replica() -> QuestionCatalog:
+            return QuestionCatalog(
+                check_seconds=3600,
+                entries=RedisCache(client, name="question_catalog"),
+                survey_groups=RedisCache(client, name="survey_group"),
+            )
+
+        first, second = replica(), replica()
+        loads: List[Any] = []
+        expected = [{"uuid": question["uuid"], "question": question["question"]}]
+
+        def loader() -> List[Dict]:
+            loads.append(1)
+            return expected
+
+        assert first.get(("group", "g1"), loader) == expected
+        sql_statements.clear()
+        assert second.get(("group", "g1"), loader) == expected
+        assert len(loads) == 1
+        assert sql_statements == []
+
+        # A change through the first replica is seen by the second straight away.
+        question_controller.create_question(
+            {"question": "Another question", "question_type": {"value": 0}}
+        )
+        first.invalidate()
+        assert second.get(("group", "g1"), loader) == expected
+        assert len(loads) == 2
@@ -0,0 +1,104 @@
+import gzip
+import json
+from typing import Dict, List
+
+import pytest
+from flask import Flask, Response
+from flask.testing import FlaskClient
+
+from dhos_questions_api.controllers import answer_controller, survey_controller
+from dhos_questions_api.helper.compression import compress_response
+from dhos_questions_api.models.group import Group
+
+
+@pytest.mark.usefixtures("mock_bearer_validation", "jwt_system")
+class TestCompression:
+    @pytest.fixture
+    def surveys(self, question_groups: List[Group]) -> List[Dict]:
+        return [
+            survey_controller.create_survey(
+                {"user_id": f"user-{i}", "group": "feedback1", "user_type": "patient"}
+            )
+            for i in range(10)
+        ]
+
+    def test_listing_gzip(self, client: FlaskClient, surveys: List[Dict]) -> None:
+        response = client.get(
+            "/dhos/v1/survey",
+            headers={"Authorization": "Bearer TOKEN", "Accept-Encoding": "gzip"},
+        )
+        assert response.status_code == 200
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert "Accept-Encoding" in response.headers["Vary"]
+        body = json.loads(gzip.decompress(response.data))
+        assert [s["uuid"] for s in body] == [s["uuid"] for s in surveys]
+
+    def test_listing_not_compressed_without_accept_encoding(
+        self, client: FlaskClient, surveys: List[Dict]
+    ) -> None:
+        response = client.get(
+            "/dhos/v1/survey",
+            headers={"Authorization": "Bearer TOKEN", "Accept-Encoding": "identity"},
+        )
+        assert "Content-Encoding" not in response.headers
+        assert response.json is not None
+        assert len(response.json) == 10
+
+    def test_small_response_not_compressed(self, app: Flask) -> None:
+        with app.test_request_context(headers={"Accept-Encoding": "gzip"}):
+            response = compress_response(Response(b"[]"))
+        assert "Content-Encoding" not in response.headers
+        assert response.get_data() == b"[]"
+
+    def test_export_gzip_streamed(
+        self,
+        app: Flask,
+        client: FlaskClient,
+        question_good: Dict,
+        survey: Dict,
+    ) -> None:
+        answer_controller.create_answers(
+            answers=[
+                {
+                    "question_id": question_good["uuid"],
+                    "survey_id": survey["uuid"],
+                    "value": "1234",
+                }
+            ]
+        )
+        expected = client.get(
+            "/dhos/v1/survey_responses", headers={"Authorization": "Bearer TOKEN"}
+        ).data
+
+        app.config["EXPORT_CHUNK_SIZE"] = 1
+        response = client.get(
+            "/dhos/v1/survey_responses",
+            headers={"Authorization": "Bearer TOKEN", "Accept-Encoding": "gzip"},
+            buffered=False,
+        )
+        assert response.headers["Content-Encoding"] == "gzip"
+        chunks = list(response.iter_encoded())
+        # The rows are sent as soon as they are compressed, then the gzip trailer.
+        assert len(chunks) == 2
+        assert gzip.decompress(b"".join(chunks)) == expected
+
+    def test_export_zstd(
+        self,
+        client: FlaskClient,
+        question_good: Dict,
+        survey: Dict,
+    ) -> None:
+        zstandard = pytest.importorskip("zstandard")
+        expected = client.get(
+            "/dhos/v1/survey_responses", headers={"Authorization": "Bearer TOKEN"}
+        ).data
+        response = client.get(
+            "/dhos/v1/survey_responses",
+            headers={
+                "Authorization": "Bearer TOKEN",
+                "Accept-Encoding": "gzip;q=0.5, zstd",
+            },
+        )
+        assert response.headers["Content-Encoding"] == "zstd"
+        reader = zstandard.ZstdDecompressor().stream_reader(response.data)
+        assert reader.read() == expected
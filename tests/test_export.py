@@ -0,0 +1,225 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.sql import select
+
+from dhos_questions_api.helper import export
+from dhos_questions_api.models.question import Question
+
+
+class FakeCursor:
+    def __init__(self, rows: List[bytes], error: Optional[Exception]) -> None:
+        self.rows = rows
+        self.error = error
+        self.copy_sql: Optional[str] = None
+
+    def mogrify(self, statement: str, params: Any) -> bytes:
+        return (statement % {k: repr(v) for k, v in params.items()}).encode("utf8")
+
+    def copy_expert(self, sql: str, file: Any) -> None:
+        self.copy_sql = sql
+        for row in self.rows:
+            file.write(row)
+        if self.error is not None:
+            raise self.error
+
+
+class FakeConnection:
+    def __init__(self, cursor: FakeCursor) -> None:
+        self._cursor = cursor
+        self.closed = False
+
+    def cursor(self) -> FakeCursor:
+        return self._cursor
+
+    def close(self) -> None:
+        self.closed = True
+
+
+class FakePostgresEngine:
+    """An engine whose raw connections pretend to run COPY on PostgreSQL."""
+
+    def __init__(self, rows: List[bytes], error: Optional[Exception] = None) -> None:
+        self.dialect = postgresql.psycopg2.dialect()
+        self.cursor = FakeCursor(rows, error)
+        self.connection = FakeConnection(self.cursor)
+
+    def raw_connection(self) -> FakeConnection:
+        return self.connection
+
+
+class SlowCursor(FakeCursor):
+    def __init__(self, rows_by_value: Dict[str, List[bytes]]) -> None:
+        super().__init__([], None)
+        self.rows_by_value = rows_by_value
+
+    def copy_expert(self, sql: str, file: Any) -> None:
+        self.copy_sql = sql
+        # The first shard finishes last, to check the shards are sent in order.
+        if "'first'" in sql:
+            time.sleep(0.2)
+        for value, rows in self.rows_by_value.items():
+            if f"'{value}'" in sql:
+                for row in rows:
+                    file.write(row)
+
+
+class FakeShardedPostgresEngine:
+    """An engine that gives each shard its own raw connection."""
+
+    def __init__(self, rows_by_value: Dict[str, List[bytes]]) -> None:
+        self.dialect = postgresql.psycopg2.dialect()
+        self.rows_by_value = rows_by_value
+        self.connections: List[FakeConnection] = []
+
+    def raw_connection(self) -> FakeConnection:
+        connection = FakeConnection(SlowCursor(self.rows_by_value))
+        self.connections.append(connection)
+        return connection
+
+
+class TestExport:
+    @pytest.mark.parametrize(
+        "chunk_size,expected_chunks", [(1, 3), (40, 2), (10000, 1)]
+    )
+    def test_iter_csv_chunks(self, chunk_size: int, expected_chunks: int) -> None:
+        rows = [("2020-01-01", "survey", f"Question {i}", str(i)) for i in range(3)]
+        chunks = list(
+            export.iter_csv(
+                data=rows, header=["a", "b", "c", "d"], chunk_size=chunk_size
+            )
+        )
+        assert len(chunks) == expected_chunks
+        assert b"".join(chunks).decode("utf8").splitlines() == [
+            "a,b,c,d",
+            "2020-01-01,survey,Question 0,0",
+            "2020-01-01,survey,Question 1,1",
+            "2020-01-01,survey,Question 2,2",
+        ]
+
+    def test_iter_csv_no_rows(self) -> None:
+        assert list(export.iter_csv(data=[], header=["a"], chunk_size=1)) == [b"a\r\n"]
+
+    def test_copy_csv(self, app_context: Any) -> None:
+        rows = [b"uuid,question\n"] + [
+            f"q{i},Question {i}\n".encode() for i in range(50)
+        ]
+        engine = FakePostgresEngine(rows)
+        query = select([Question.uuid, Question.question]).where(
+            Question.question == "x"
+        )
+        chunks = list(
+            export.export_csv_shards(
+                engine,  # type: ignore
+                [query],
+                fetch_size=10,
+                chunk_size=100,
+                shard_exporter=export.ShardExporter(engine, workers=1),  # type: ignore
+            )
+        )
+
+        assert b"".join(chunks) == b"".join(rows)
+        assert len(chunks) > 1
+        assert all(len(chunk) < 200 for chunk in chunks)
+        assert engine.cursor.copy_sql is not None
+        assert engine.cursor.copy_sql.startswith("COPY (SELECT question.uuid")
+        assert engine.cursor.copy_sql.endswith(") TO STDOUT WITH CSV HEADER")
+        assert "'x'" in engine.cursor.copy_sql
+        assert engine.connection.closed
+
+    def test_copy_csv_failure(self, app_context: Any) -> None:
+        engine = FakePostgresEngine([b"a\n"], error=RuntimeError("COPY failed"))
+        query = select([Question.uuid])
+        with pytest.raises(RuntimeError):
+            list(
+                export.export_csv_shards(
+                    engine,  # type: ignore
+                    [query],
+                    fetch_size=10,
+                    chunk_size=100,
+                    shard_exporter=export.ShardExporter(engine, workers=1),  # type: ignore
+                )
+            )
+        assert engine.connection.closed
+
+    def test_copy_csv_shards(self, app_context: Any) -> None:
+        rows_by_value = {
+            "first": [b"uuid\n", b"q1\n", b"q2\n"],
+            "second": [b"q3\n"],
+            "third": [b"q4\n", b"q5\n"],
+        }
+        engine = FakeShardedPostgresEngine(rows_by_value)
+        queries = [
+            select([Question.uuid]).where(Question.question == value)
+            for value in rows_by_value
+        ]
+        chunks = list(
+            export.export_csv_shards(
+                engine,  # type: ignore
+                queries,
+                fetch_size=10,
+                chunk_size=1,
+                shard_exporter=export.ShardExporter(engine, workers=3),  # type: ignore
+            )
+        )
+
+        assert b"".join(chunks) == b"uuid\nq1\nq2\nq3\nq4\nq5\n"
+        assert len(engine.connections) == 3
+        copy_sql: Dict[str, str] = {}
+        for connection in engine.connections:
+            assert connection.closed
+            sql = connection.cursor().copy_sql
+            assert sql is not None
+            copy_sql.update({value: sql for value in rows_by_value if value in sql})
+        assert copy_sql["first"].endswith(") TO STDOUT WITH CSV HEADER")
+        assert copy_sql["second"].endswith(") TO STDOUT WITH CSV")
+        assert copy_sql["third"].endswith(") TO STDOUT WITH CSV")
+
+    def test_copy_csv_shards_shared_between_exports(self, app_context: Any) -> None:
+        rows_by_value = {"first": [b"uuid\n", b"q1\n"], "second": [b"q2\n"] * 20}
+        engine = FakeShardedPostgresEngine(rows_by_value)
+        queries = [
+            select([Question.uuid]).where(Question.question == value)
+            for value in rows_by_value
+        ]
+        # With a single worker, one export waits for the other to finish rather
+        # than either holding a connection the other needs.
+        shard_exporter = export.ShardExporter(engine, workers=1)  # type: ignore
+        with ThreadPoolExecutor(max_workers=2) as clients:
+            downloads = [
+                clients.submit(
+                    lambda: b"".join(
+                        export.export_csv_shards(
+                            engine,  # type: ignore
+                            queries,
+                            fetch_size=10,
+                            chunk_size=1,
+                            shard_exporter=shard_exporter,
+                        )
+                    )
+                )
+                for _ in range(2)
+            ]
+            for download in downloads:
+                assert download.result(timeout=5) == b"uuid\nq1\n" + b"q2\n" * 20
+        assert len(engine.connections) == 4
+        assert all(connection.closed for connection in engine.connections)
+
+    def test_pivot_answers(self) -> None:
+        rows = [
+            ("s1", "t1", "q1", "a"),
+            ("s1", "t2", "q2", "x"),
+            ("s1", "t3", "q2", "y"),
+            ("s2", "t4", "q2", "z"),
+            ("s2", "t5", "q-unknown", "ignored"),
+            ("s3", "t6", "q2", "x;y"),
+            ("s3", "t7", "q2", "back\\slash"),
+        ]
+        assert list(export.pivot_answers(rows, ["q1", "q2"])) == [
+            ("s1", "t1", "a", "x;y"),
+            ("s2", "t4", "", "z"),
+            ("s3", "t6", "", "x\\;y;back\\\\slash"),
+        ]
@@ -0,0 +1,124 @@
+import os
+from datetime import datetime
+from typing import Any, Callable, Generator, List
+
+import pytest
+from flask_batteries_included.sqldb import db
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Query
+
+from dhos_questions_api.helper.pagination import order_page
+from dhos_questions_api.models.answer import Answer
+from dhos_questions_api.models.survey import Survey
+from dhos_questions_api.queries.answer import (
+    query_answer_changes,
+    query_answers,
+    query_answers_by_survey_uuid,
+)
+from dhos_questions_api.queries.group import query_group_by_name
+from dhos_questions_api.queries.question import query_questions_by_group_uuid
+from dhos_questions_api.queries.survey import query_surveys
+
+SCHEMA = "index_test"
+PAGE_SIZE = 100
+
+
+@pytest.fixture(scope="module")
+def pg_connection() -> Generator[Connection, None, None]:
+    """
+    A connection to the PostgreSQL database started by tox, with the tables created
+    from the models in a schema of their own. The tests are skipped without one.
+    """
+    if "DATABASE_HOST" not in os.environ:
+        pytest.skip("Needs a PostgreSQL database (DATABASE_HOST)")
+    engine = create_engine(
+        "postgresql+psycopg2://{user}:{password}@{host}:{port}/{name}".format(
+            user=os.environ["DATABASE_USER"],
+            password=os.environ["DATABASE_PASSWORD"],
+            host=os.environ["DATABASE_HOST"],
+            port=os.environ.get("DATABASE_PORT", "5432"),
+            name=os.environ["DATABASE_NAME"],
+        )
+    )
+    try:
+        connection = engine.connect()
+    except OperationalError:
+        pytest.skip("PostgreSQL database is not available")
+
+    connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+    connection.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    connection.execute(text(f"SET search_path TO {SCHEMA}"))
+    db.metadata.create_all(connection)
+    # The tables are empty, so the planner would otherwise always scan them.
+    connection.execute(text("SET enable_seqscan = off"))
+    yield connection
+    connection.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+    connection.close()
+    engine.dispose()
+
+
+def explain(connection: Connection, query: Query) -> str:
+    compiled = query.statement.compile(dialect=connection.dialect)
+    rows: List = connection.exec_driver_sql(
+        f"EXPLAIN {compiled}", compiled.params
+    ).fetchall()
+    return "\n".join(row[0] for row in rows)
+
+
+def page(query: Query, model: Any) -> Query:
+    # The first page of a paginated endpoint, as built by paginate().
+    return order_page(query, model, cursor=None).limit(PAGE_SIZE + 1)
+
+
+# The queries made by each endpoint, and the index each is expected to use.
+@pytest.mark.parametrize(
+    "endpoint,build_query,index",
+    [
+        (
+            "GET /answer",
+            lambda: page(query_answers(), Answer),
+            "answer_modified_uuid",
+        ),
+        (
+            "GET /answer_changes",
+            lambda: page(query_answer_changes(datetime.utcnow()), Answer),
+            "answer_modified_uuid",
+        ),
+        (
+            "GET /survey/{survey_uuid}/answer",
+            lambda: query_answers_by_survey_uuid("s1"),
+            "only_one_active_identical_question_option",
+        ),
+        (
+            "GET /survey",
+            lambda: page(query_surveys(), Survey),
+            "survey_modified_uuid",
+        ),
+        (
+            "GET /survey?user_id=...&user_type=...",
+            lambda: page(query_surveys(user_id="u1", user_type="patient"), Survey),
+            "survey_user_modified_uuid",
+        ),
+        (
+            "POST /survey",
+            lambda: query_group_by_name("feedback1").limit(1),
+            "group_group",
+        ),
+        (
+            "GET /group/{group_uuid}/question",
+            lambda: query_questions_by_group_uuid("g1"),
+            "question_group_group_id",
+        ),
+    ],
+)
+@pytest.mark.usefixtures("app_context")
+def test_query_uses_index(
+    pg_connection: Connection,
+    endpoint: str,
+    build_query: Callable[[], Query],
+    index: str,
+) -> None:
+    plan: str = explain(pg_connection, build_query())
+    assert index in plan, f"{endpoint} does not use {index}:\n{plan}"
@@ -1,7 +1,14 @@
+import time
 from typing import Any, Dict, List, Tuple
 
+import pytest
 from flask.testing import FlaskClient
+from flask_batteries_included.sqldb import db
+from pytest_mock import MockFixture
 
+from dhos_questions_api.controllers import question_controller
+from dhos_questions_api.helper import cache
+from dhos_questions_api.helper.question_catalog import get_question_catalog
 from dhos_questions_api.models.group import Group
 from dhos_questions_api.models.question import Question
 from dhos_questions_api.models.question_option_type import QuestionOptionType
@@ -238,3 +245,176 @@ class TestQuestionRoutes:
         )
 
         assert response.status_code == 200
+
+    def test_get_questions_query_count_does_not_grow(
+        self,
+        client: FlaskClient,
+        question_in_survey: Tuple[Dict, Dict],
+        question_option_types: List[QuestionOptionType],
+        sql_statements: List[str],
+        jwt_system: str,
+        mock_bearer_validation: Any,
+    ) -> None:
+        question, survey = question_in_survey
+        group_uuid = question["groups"][0]["uuid"]
+        urls = [
+            f"/dhos/v1/group/{group_uuid}/question",
+            f"/dhos/v1/survey/{survey['uuid']}/question",
+            "/question",
+        ]
+
+        def count_queries() -> List[int]:
+            counts = []
+            for url in urls:
+                get_question_catalog().clear()
+                sql_statements.clear()
+                response = client.get(url, headers={"Authorization": "Bearer TOKEN"})
+                assert response.status_code == 200
+                counts.append(len(sql_statements))
+            return counts
+
+        expected = count_queries()
+
+        for i in range(5):
+            question_controller.create_question(
+                {
+                    "question": f"Question {i}",
+                    "question_type": {"value": 3},
+                    "question_options": [
+                        {"text": "Yes", "value": "1", "question_option_type": 0},
+                        {"text": "No", "value": "0", "question_option_type": 0},
+                    ],
+                    "groups": [{"group": "feedback1"}],
+                }
+            )
+
+        assert count_queries() == expected
+
+        response = client.get(urls[0], headers={"Authorization": "Bearer TOKEN"})
+        assert response.json is not None
+        assert len(response.json) == 6
+        options = response.json[-1]["question_options"]
+        assert options[0]["question_option_type"]["value"] == 0
+
+    def test_get_questions_served_from_catalog_cache(
+        self,
+        client: FlaskClient,
+        question_in_survey: Tuple[Dict, Dict],
+        sql_statements: List[str],
+        jwt_system: str,
+        mock_bearer_validation: Any,
+    ) -> None:
+        question, survey = question_in_survey
+        url = f"/dhos/v1/survey/{survey['uuid']}/question"
+        first = client.get(url, headers={"Authorization": "Bearer TOKEN"})
+        assert first.status_code == 200
+
+        sql_statements.clear()
+        second = client.get(url, headers={"Authorization": "Bearer TOKEN"})
+        assert second.status_code == 200
+        assert second.json == first.json
+        assert sql_statements == []
+
+        sql_statements.clear()
+        by_uuid = client.get(
+            f"/dhos/v1/question/{question['uuid']}",
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert by_uuid.status_code == 200
+        by_uuid = client.get(
+            f"/dhos/v1/question/{question['uuid']}",
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert first.json is not None
+        assert by_uuid.json == first.json[0]
+        # Only the first request for the question by UUID loads it.
+        assert len(sql_statements) == 3
+
+    def test_catalog_cache_invalidation(
+        self,
+        client: FlaskClient,
+        question_in_survey: Tuple[Dict, Dict],
+        jwt_system: str,
+        mock_bearer_validation: Any,
+        mocker: MockFixture,
+    ) -> None:
+        question, survey = question_in_survey
+        url = f"/dhos/v1/survey/{survey['uuid']}/question"
+        response = client.get(url, headers={"Authorization": "Bearer TOKEN"})
+        assert response.json is not None
+        assert len(response.json) == 1
+
+        # Changes made through this service are seen straight away.
+        question_controller.create_question(
+            {
+                "question": "Another question",
+                "question_type": {"value": 0},
+                "groups": [{"group": "feedback1"}],
+            }
+        )
+        response = client.get(url, headers={"Authorization": "Bearer TOKEN"})
+        assert response.json is not None
+        assert len(response.json) == 2
+
+        # Changes made elsewhere are seen once the version stamp is next checked.
+        db_question = Question.query.filter_by(uuid=question["uuid"]).one()
+        db_question.question = "Changed elsewhere"
+        db.session.commit()
+        response = client.get(url, headers={"Authorization": "Bearer TOKEN"})
+        assert response.json is not None
+        assert question["question"] in [q["question"] for q in response.json]
+
+        mocker.patch.object(
+            cache.time,
+            "monotonic",
+            return_value=time.monotonic() + get_question_catalog().check_seconds,
+        )
+        response = client.get(url, headers={"Authorization": "Bearer TOKEN"})
+        assert response.json is not None
+        assert "Changed elsewhere" in [q["question"] for q in response.json]
+
+    @pytest.mark.parametrize(
+        "url_template",
+        [
+            "/dhos/v1/question/{question}",
+            "/dhos/v1/survey/{survey}/question",
+            "/dhos/v1/group/feedback1/question",
+        ],
+    )
+    def test_get_questions_not_modified(
+        self,
+        client: FlaskClient,
+        question_in_survey: Tuple[Dict, Dict],
+        sql_statements: List[str],
+        jwt_system: str,
+        mock_bearer_validation: Any,
+        url_template: str,
+    ) -> None:
+        question, survey = question_in_survey
+        url = url_template.format(question=question["uuid"], survey=survey["uuid"])
+        response = client.get(url, headers={"Authorization": "Bearer TOKEN"})
+        assert response.status_code == 200
+        etag = response.headers["ETag"]
+        assert not etag.startswith("W/")
+
+        sql_statements.clear()
+        response = client.get(
+            url, headers={"Authorization": "Bearer TOKEN", "If-None-Match": etag}
+        )
+        assert response.status_code == 304
+        assert response.headers["ETag"] == etag
+        assert response.data == b""
+        assert sql_statements == []
+
+        question_controller.create_question(
+            {
+                "question": "Another question",
+                "question_type": {"value": 0},
+                "groups": [{"group": "feedback1"}],
+            }
+        )
+        response = client.get(
+            url, headers={"Authorization": "Bearer TOKEN", "If-None-Match": etag}
+        )
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
@@ -0,0 +1,74 @@
+from typing import Dict, List
+
+import pytest
+from flask.testing import FlaskClient
+
+from dhos_questions_api.controllers import question_controller
+from dhos_questions_api.helper.question_validator import (
+    QuestionValidator,
+    get_validators,
+)
+from dhos_questions_api.models.question import Question
+
+
+@pytest.mark.usefixtures(
+    "mock_bearer_validation",
+    "jwt_gdm_clinician_uuid",
+    "question_types",
+    "question_option_types",
+    "question_groups",
+)
+class TestQuestionValidator:
+    @pytest.fixture
+    def range_question(self) -> Dict:
+        return question_controller.create_question(
+            {
+                "question": "How satisfied are you?",
+                "question_type": {"value": 5},
+                "question_options": [
+                    {"text": "Not at all", "value": "0", "question_option_type": 2},
+                    {"text": "Very", "value": "10", "question_option_type": 3},
+                    {"value": "2", "question_option_type": 4},
+                ],
+                "groups": [{"group": "feedback1"}],
+            }
+        )
+
+    @pytest.mark.parametrize(
+        "value,expected",
+        [("0", True), ("4", True), ("10", True), ("3", False), ("12", False)],
+    )
+    def test_range(self, range_question: Dict, value: str, expected: bool) -> None:
+        question = Question.query.filter_by(uuid=range_question["uuid"]).one()
+        validator: QuestionValidator = get_validators([question])[question.uuid]
+        assert validator.range_min == 0.0
+        assert validator.range_max == 10.0
+        assert validator.range_interval == 2.0
+        assert validator.validate([{"value": value}]) is expected
+
+    def test_range_not_a_number(self, range_question: Dict) -> None:
+        question = Question.query.filter_by(uuid=range_question["uuid"]).one()
+        validator: QuestionValidator = get_validators([question])[question.uuid]
+        assert validator.validate([{"value": "lots"}]) is False
+
+    def test_cached_validator_loads_no_options(
+        self, range_question: Dict, sql_statements: List[str]
+    ) -> None:
+        question = Question.query.filter_by(uuid=range_question["uuid"]).one()
+        first = get_validators([question])[question.uuid]
+        assert [s for s in sql_statements if "FROM question_option" in s]
+
+        sql_statements.clear()
+        second = get_validators([question])[question.uuid]
+        assert second is first
+        assert sql_statements == []
+
+    def test_create_range_answer_out_of_range(
+        self, client: FlaskClient, survey: Dict, range_question: Dict
+    ) -> None:
+        response = client.post(
+            f"/dhos/v1/survey/{survey['uuid']}/answer",
+            json=[{"question_id": range_question["uuid"], "value": "11"}],
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 400
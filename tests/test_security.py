@@ -0,0 +1,164 @@
+from typing import Any, Dict, List
+
+import pytest
+from flask import Flask, g
+from flask.testing import FlaskClient
+
+from dhos_questions_api.controllers import question_controller, survey_controller
+from dhos_questions_api.helper.security import forget_surveys, load_surveys
+
+
+@pytest.fixture
+def jwt_survey_patient(app_context: Any, survey: Dict) -> str:
+    """Use this fixture to make requests as the patient the survey is for"""
+    g.jwt_claims = {"patient_id": survey["user_id"]}
+    g.jwt_scopes = [
+        "write:gdm_answer",
+        "read:gdm_answer",
+        "read:gdm_survey",
+        "read:gdm_question",
+    ]
+    return survey["user_id"]
+
+
+@pytest.fixture
+def multi_question(question_types: Any, question_option_types: Any) -> Dict:
+    return question_controller.create_question(
+        {
+            "question": "Which would you like?",
+            "question_type": {"value": 6},
+            "question_options": [
+                {"value": value, "question_option_type": 0} for value in "abc"
+            ],
+            "groups": [{"group": "feedback1"}],
+        }
+    )
+
+
+@pytest.mark.usefixtures("mock_bearer_validation", "jwt_survey_patient")
+class TestSurveyByUuidProtection:
+    def test_answers_checked_in_one_query(
+        self,
+        client: FlaskClient,
+        survey: Dict,
+        multi_question: Dict,
+        sql_statements: List[str],
+    ) -> None:
+        response = client.post(
+            "/dhos/v1/answer",
+            json=[
+                {
+                    "question_id": multi_question["uuid"],
+                    "survey_id": survey["uuid"],
+                    "value": value,
+                }
+                for value in "abc"
+            ],
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 200
+        # The ownership check and the answer validation share one survey lookup.
+        survey_queries = [
+            statement
+            for statement in sql_statements
+            if statement.startswith("SELECT") and "FROM survey" in statement
+        ]
+        assert len(survey_queries) == 1
+
+    def test_answers_for_another_users_survey(
+        self, client: FlaskClient, survey: Dict, multi_question: Dict
+    ) -> None:
+        other_survey = survey_controller.create_survey(
+            {"user_id": "another", "group": "feedback1", "user_type": "patient"}
+        )
+        response = client.post(
+            "/dhos/v1/answer",
+            json=[
+                {
+                    "question_id": multi_question["uuid"],
+                    "survey_id": survey_uuid,
+                    "value": "a",
+                }
+                for survey_uuid in [survey["uuid"], other_survey["uuid"]]
+            ],
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 403
+
+    def test_answers_for_unknown_survey(
+        self, client: FlaskClient, multi_question: Dict
+    ) -> None:
+        response = client.post(
+            "/dhos/v1/answer",
+            json=[
+                {
+                    "question_id": multi_question["uuid"],
+                    "survey_id": "unknown",
+                    "value": "a",
+                }
+            ],
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 404
+
+    def test_surveys_remembered_for_request(
+        self, app: Flask, survey: Dict, sql_statements: List[str]
+    ) -> None:
+        with app.test_request_context():
+            assert load_surveys([survey["uuid"], "unknown"]).keys() == {survey["uuid"]}
+            assert load_surveys([survey["uuid"]]).keys() == {survey["uuid"]}
+            assert load_surveys(["unknown"]) == {}
+        assert len(sql_statements) == 1
+
+    def test_bundle_for_own_survey(
+        self,
+        client: FlaskClient,
+        answer_good: Dict,
+        survey: Dict,
+        sql_statements: List[str],
+    ) -> None:
+        # The answer was validated inside pytest-flask's request context.
+        forget_surveys()
+        url = f"/dhos/v1/survey/{survey['uuid']}/bundle"
+        response = client.get(url, headers={"Authorization": "Bearer TOKEN"})
+        assert response.status_code == 200
+        sql_statements.clear()
+
+        # With the questions cached, the ownership check's survey lookup is reused
+        # and only the answers are queried besides it.
+        response = client.get(url, headers={"Authorization": "Bearer TOKEN"})
+        assert response.status_code == 200
+        assert response.json is not None
+        assert [a["uuid"] for a in response.json["answers"]] == [answer_good["uuid"]]
+        assert len(sql_statements) == 2
+
+    def test_bundle_for_another_users_survey(self, client: FlaskClient) -> None:
+        other_survey = survey_controller.create_survey(
+            {"user_id": "another", "group": "feedback1", "user_type": "patient"}
+        )
+        response = client.get(
+            f"/dhos/v1/survey/{other_survey['uuid']}/bundle",
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 403
+
+
+@pytest.mark.usefixtures("mock_bearer_validation", "jwt_survey_patient")
+class TestSurveyUserProtection:
+    def test_own_surveys(self, client: FlaskClient, survey: Dict) -> None:
+        response = client.get(
+            f"/dhos/v1/survey?user_id={survey['user_id']}&user_type=patient",
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 200
+        assert response.json is not None
+        assert [s["uuid"] for s in response.json] == [survey["uuid"]]
+
+    @pytest.mark.parametrize(
+        "query", ["", "user_id=another&user_type=patient", "user_type=patient"]
+    )
+    def test_other_surveys(self, client: FlaskClient, survey: Dict, query: str) -> None:
+        response = client.get(
+            f"/dhos/v1/survey?{query}", headers={"Authorization": "Bearer TOKEN"}
+        )
+        assert response.status_code == 403
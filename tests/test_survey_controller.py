@@ -1,13 +1,43 @@
-from datetime import date, datetime, timedelta
+import csv
+import os
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from io import BytesIO, StringIO
 from typing import Any, Dict, List
 
 import pytest
+from flask import Flask
 from flask.testing import FlaskClient
+from flask_batteries_included.sqldb import db
+from pytest_mock import MockFixture
+from sqlalchemy import event
 
-from dhos_questions_api.controllers import answer_controller
+from dhos_questions_api.controllers import (
+    answer_controller,
+    question_controller,
+    survey_controller,
+)
+from dhos_questions_api.helper import export
+from dhos_questions_api.helper.export_jobs import ExportJobs
+from dhos_questions_api.models.answer import Answer
 from dhos_questions_api.models.group import Group
 
 
+def wait_for_job(client: FlaskClient, job_id: str) -> Dict:
+    for _ in range(100):
+        response = client.get(
+            f"/dhos/v1/survey_responses/job/{job_id}",
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 200
+        assert response.json is not None
+        if response.json["status"] != "running":
+            return response.json
+        time.sleep(0.05)
+    raise AssertionError(f"Export job {job_id} did not finish")
+
+
 @pytest.mark.usefixtures("mock_bearer_validation")
 class TestSurveyController:
     def test_create_survey(
@@ -63,6 +93,158 @@ class TestSurveyController:
         assert response.json is not None
         assert response.json[0]["uuid"] == survey["uuid"]
 
+    def test_get_all_surveys_with_fields(
+        self,
+        client: FlaskClient,
+        survey: Dict,
+        jwt_system: str,
+        mock_bearer_validation: Any,
+        sql_statements: List[str],
+    ) -> None:
+        response = client.get(
+            "/dhos/v1/survey?fields=uuid,user_id",
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 200
+        assert response.json == [{"uuid": survey["uuid"], "user_id": survey["user_id"]}]
+        # The group is neither joined nor loaded when it isn't asked for.
+        survey_queries = [s for s in sql_statements if "FROM survey" in s]
+        assert len(survey_queries) == 1
+        assert "group" not in survey_queries[0]
+        assert not [s for s in sql_statements if 'FROM "group"' in s]
+
+    def test_get_all_surveys_with_group_field(
+        self,
+        client: FlaskClient,
+        survey: Dict,
+        jwt_system: str,
+        mock_bearer_validation: Any,
+    ) -> None:
+        response = client.get(
+            "/dhos/v1/survey?fields=group,completed",
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 200
+        assert response.json is not None
+        assert [s.keys() for s in response.json] == [{"group"}]
+        assert response.json[0]["group"]["uuid"] == survey["group"]["uuid"]
+
+    def test_get_all_surveys_paginated(
+        self,
+        client: FlaskClient,
+        question_groups: List[Group],
+        jwt_system: str,
+        sql_statements: List[str],
+    ) -> None:
+        created = [
+            survey_controller.create_survey(
+                {"user_id": f"user-{i}", "group": "feedback1", "user_type": "patient"}
+            )
+            for i in range(5)
+        ]
+
+        pages: List[List[Dict]] = []
+        statements_per_page: List[int] = []
+        url = "/dhos/v1/survey?limit=2"
+        while True:
+            sql_statements.clear()
+            response = client.get(url, headers={"Authorization": "Bearer TOKEN"})
+            statements_per_page.append(len(sql_statements))
+            assert response.status_code == 200
+            assert response.json is not None
+            pages.append(response.json)
+            if "X-Next-Cursor" not in response.headers:
+                break
+            url = f"/dhos/v1/survey?limit=2&cursor={response.headers['X-Next-Cursor']}"
+
+        assert [len(page) for page in pages] == [2, 2, 1]
+        assert [s["uuid"] for page in pages for s in page] == [
+            s["uuid"] for s in created
+        ]
+        assert all(page[0]["group"]["group"] == "feedback1" for page in pages)
+        # Each page is loaded with its groups in a single query.
+        assert statements_per_page == [1, 1, 1]
+
+    @pytest.mark.parametrize("query", ["limit=0", "cursor=bad"])
+    def test_get_all_surveys_bad_page(
+        self, client: FlaskClient, survey: Dict, jwt_system: str, query: str
+    ) -> None:
+        response = client.get(
+            f"/dhos/v1/survey?{query}", headers={"Authorization": "Bearer TOKEN"}
+        )
+        assert response.status_code == 400
+
+    def test_get_surveys_for_user(
+        self, client: FlaskClient, jwt_system: str, survey: Dict
+    ) -> None:
+        completed = survey_controller.create_survey(
+            {"user_id": survey["user_id"], "group": "feedback1", "user_type": "patient"}
+        )
+        survey_controller.update_survey(
+            completed["uuid"], {"completed": "2018-03-15T10:11:52.683Z"}
+        )
+        survey_controller.create_survey(
+            {"user_id": "another", "group": "feedback1", "user_type": "patient"}
+        )
+
+        response = client.get(
+            f"/dhos/v1/survey?user_id={survey['user_id']}&user_type=patient",
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 200
+        assert response.json is not None
+        by_uuid = {s["uuid"]: s for s in response.json}
+        assert by_uuid.keys() == {survey["uuid"], completed["uuid"]}
+        assert "completed" in by_uuid[completed["uuid"]]
+
+        response = client.get(
+            f"/dhos/v1/survey?user_id={survey['user_id']}&user_type=patient&pending=true",
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 200
+        assert response.json is not None
+        assert [s["uuid"] for s in response.json] == [survey["uuid"]]
+
+    def test_search_surveys(
+        self,
+        client: FlaskClient,
+        answer_good: Dict,
+        survey: Dict,
+        jwt_system: str,
+        sql_statements: List[str],
+    ) -> None:
+        other_survey = survey_controller.create_survey(
+            {"user_id": "another", "group": "feedback1", "user_type": "patient"}
+        )
+        sql_statements.clear()
+
+        response = client.post(
+            "/dhos/v1/survey/search",
+            json={"uuids": [other_survey["uuid"], "unknown", survey["uuid"]]},
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 200
+        assert response.json is not None
+        assert [s["uuid"] for s in response.json] == [
+            other_survey["uuid"],
+            survey["uuid"],
+        ]
+        assert response.json[0]["answers"] == []
+        assert [a["uuid"] for a in response.json[1]["answers"]] == [answer_good["uuid"]]
+        assert len(sql_statements) == 2
+
+    @pytest.mark.parametrize("count", [0, 3])
+    def test_search_surveys_bad_batch_size(
+        self, app: Flask, client: FlaskClient, jwt_system: str, count: int
+    ) -> None:
+        app.config["MAX_SURVEY_BATCH_SIZE"] = 2
+        response = client.post(
+            "/dhos/v1/survey/search",
+            json={"uuids": [f"survey-{i}" for i in range(count)]},
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 400
+
     def test_get_survey_by_uuid(
         self,
         client: FlaskClient,
@@ -77,6 +259,77 @@ class TestSurveyController:
         assert response.json is not None
         assert response.json["user_id"] == survey["user_id"]
 
+    def test_get_survey_by_uuid_not_modified(
+        self,
+        client: FlaskClient,
+        survey: Dict,
+        jwt_system: str,
+    ) -> None:
+        url = f"/dhos/v1/survey/{survey['uuid']}"
+        response = client.get(url, headers={"Authorization": "Bearer TOKEN"})
+        etag = response.headers["ETag"]
+
+        response = client.get(
+            url, headers={"Authorization": "Bearer TOKEN", "If-None-Match": etag}
+        )
+        assert response.status_code == 304
+        assert response.headers["ETag"] == etag
+
+        client.patch(
+            url,
+            json={"completed": "2018-03-15T10:11:52.683Z"},
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        response = client.get(
+            url, headers={"Authorization": "Bearer TOKEN", "If-None-Match": etag}
+        )
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+        assert response.json is not None
+        assert response.json["completed"] == "2018-03-15T10:11:52.683Z"
+
+    def test_get_survey_by_uuid_not_found(
+        self,
+        client: FlaskClient,
+        jwt_system: str,
+    ) -> None:
+        response = client.get(
+            "/dhos/v1/survey/does-not-exist",
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 404
+
+    def test_get_survey_bundle(
+        self,
+        client: FlaskClient,
+        answer_good: Dict,
+        question_good: Dict,
+        survey: Dict,
+        jwt_system: str,
+    ) -> None:
+        response = client.get(
+            f"/dhos/v1/survey/{survey['uuid']}/bundle",
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 200
+        assert response.json is not None
+        assert response.json["survey"]["uuid"] == survey["uuid"]
+        assert [q["uuid"] for q in response.json["questions"]] == [
+            question_good["uuid"]
+        ]
+        assert [a["uuid"] for a in response.json["answers"]] == [answer_good["uuid"]]
+
+    def test_get_survey_bundle_not_found(
+        self,
+        client: FlaskClient,
+        jwt_system: str,
+    ) -> None:
+        response = client.get(
+            "/dhos/v1/survey/does-not-exist/bundle",
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 404
+
     def test_update_survey(
         self, client: FlaskClient, question_good: Dict, jwt_system: str, survey: Dict
     ) -> None:
@@ -149,6 +402,58 @@ class TestSurveyController:
         assert isinstance(response.data.decode("utf8"), str)
         assert expected_answer in response.data.decode("utf8")
 
+    def test_get_survey_responses_streamed(
+        self,
+        client: FlaskClient,
+        question_good: Dict,
+        jwt_system: str,
+        survey: Dict,
+    ) -> None:
+        answer_controller.create_answers(
+            answers=[
+                {
+                    "question_id": question_good["uuid"],
+                    "survey_id": survey["uuid"],
+                    "value": "1234",
+                }
+            ]
+        )
+        executed: List[Dict] = []
+
+        def before_cursor_execute(
+            conn: Any,
+            cursor: Any,
+            statement: str,
+            parameters: Any,
+            context: Any,
+            executemany: bool,
+        ) -> None:
+            if "FROM answer JOIN question" in statement:
+                executed.append(context.execution_options)
+
+        event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            response = client.get(
+                "/dhos/v1/survey_responses",
+                headers={"Authorization": "Bearer TOKEN"},
+                buffered=False,
+            )
+            assert response.status_code == 200
+            assert response.is_streamed
+            # The export is not read into memory to compute an ETag.
+            assert "ETag" not in response.headers
+            lines = response.data.decode("utf8").splitlines()
+        finally:
+            event.remove(db.engine, "before_cursor_execute", before_cursor_execute)
+
+        assert lines[0] == "created,survey_id,question,answer"
+        assert lines[1].endswith(
+            f'{survey["uuid"]},"Hello, is it me you are looking for?",1234'
+        )
+        assert len(executed) == 1
+        assert executed[0]["stream_results"] is True
+        assert executed[0]["max_row_buffer"] == 1000
+
     @pytest.mark.parametrize(
         "start_delta,end_delta,expected",
         [
@@ -190,3 +495,392 @@ class TestSurveyController:
         assert response.headers["Content-Type"] == "text/csv; charset=utf-8"
         assert isinstance(response.data.decode("utf8"), str)
         assert (expected_answer in response.data.decode("utf8")) == expected
+
+    @pytest.mark.usefixtures("question_types", "question_option_types")
+    def test_get_survey_responses_sharded(
+        self,
+        app: Flask,
+        client: FlaskClient,
+        jwt_system: str,
+        survey: Dict,
+        sql_statements: List[str],
+    ) -> None:
+        app.config["EXPORT_SHARD_DAYS"] = 30
+        multi_question = question_controller.create_question(
+            {
+                "question": "Which would you like?",
+                "question_type": {"value": 6},
+                "question_options": [
+                    {"value": value, "question_option_type": 0} for value in "abc"
+                ],
+                "groups": [{"group": "feedback1"}],
+            }
+        )
+        answers = answer_controller.create_answers(
+            answers=[
+                {
+                    "question_id": multi_question["uuid"],
+                    "survey_id": survey["uuid"],
+                    "value": value,
+                }
+                for value in "abc"
+            ]
+        )
+        # Spread the answers over three 30 day shards, oldest first.
+        now = datetime.now(tz=timezone.utc)
+        for answer, days_ago in zip(answers, [80, 40, 0]):
+            Answer.query.filter_by(uuid=answer["uuid"]).update(
+                {"modified": now - timedelta(days=days_ago)}
+            )
+        db.session.commit()
+        sql_statements.clear()
+
+        response = client.get(
+            "/dhos/v1/survey_responses", headers={"Authorization": "Bearer TOKEN"}
+        )
+        assert response.status_code == 200
+        rows = list(csv.reader(StringIO(response.data.decode("utf8"))))
+        assert rows[0] == ["created", "survey_id", "question", "answer"]
+        assert [row[3] for row in rows[1:]] == ["a", "b", "c"]
+        export_queries = [
+            statement
+            for statement in sql_statements
+            if statement.startswith("SELECT answer.created")
+        ]
+        assert len(export_queries) == 3
+
+    def test_get_survey_responses_parquet(
+        self,
+        client: FlaskClient,
+        question_good: Dict,
+        jwt_system: str,
+        survey: Dict,
+    ) -> None:
+        pyarrow_parquet = pytest.importorskip("pyarrow.parquet")
+        answers = answer_controller.create_answers(
+            answers=[
+                {
+                    "question_id": question_good["uuid"],
+                    "survey_id": survey["uuid"],
+                    "value": "1234",
+                }
+            ]
+        )
+        response = client.get(
+            "/dhos/v1/survey_responses?format=parquet",
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 200
+        assert response.headers["Content-Type"] == "application/vnd.apache.parquet"
+        table = pyarrow_parquet.read_table(BytesIO(response.data))
+        assert table.column_names == ["created", "survey_id", "question", "answer"]
+        assert str(table.schema.field("created").type) == "timestamp[us, tz=UTC]"
+        row = table.to_pylist()[0]
+        assert row["survey_id"] == survey["uuid"]
+        assert row["question"] == question_good["question"]
+        assert row["answer"] == "1234"
+        assert row["created"] == answers[0]["created"]
+
+    def test_get_survey_responses_parquet_unavailable(
+        self,
+        client: FlaskClient,
+        jwt_system: str,
+        mocker: MockFixture,
+    ) -> None:
+        mocker.patch.object(export, "pyarrow", None)
+        response = client.get(
+            "/dhos/v1/survey_responses?format=parquet",
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 501
+
+    @pytest.mark.usefixtures("question_option_types")
+    def test_get_survey_responses_wide(
+        self,
+        client: FlaskClient,
+        question_good: Dict,
+        jwt_system: str,
+        survey: Dict,
+    ) -> None:
+        multi_question = question_controller.create_question(
+            {
+                "question": "Which would you like?",
+                "question_type": {"value": 6},
+                "question_options": [
+                    {"value": value, "question_option_type": 0} for value in "abc"
+                ],
+                "groups": [{"group": "feedback1"}],
+            }
+        )
+        other_survey = survey_controller.create_survey(
+            {"user_id": "another", "group": "feedback1", "user_type": "patient"}
+        )
+        answer_controller.create_answers(
+            answers=[
+                {
+                    "question_id": question_good["uuid"],
+                    "survey_id": survey["uuid"],
+                    "value": "Hello",
+                },
+                {
+                    "question_id": multi_question["uuid"],
+                    "survey_id": survey["uuid"],
+                    "value": "a",
+                },
+                {
+                    "question_id": multi_question["uuid"],
+                    "survey_id": survey["uuid"],
+                    "value": "c",
+                },
+                {
+                    "question_id": multi_question["uuid"],
+                    "survey_id": other_survey["uuid"],
+                    "value": "b",
+                },
+            ]
+        )
+        response = client.get(
+            "/dhos/v1/survey_responses?layout=wide",
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 200
+        rows = list(csv.reader(StringIO(response.data.decode("utf8"))))
+        assert rows[0] == [
+            "survey_id",
+            "created",
+            f"Hello, is it me you are looking for? ({question_good['uuid']})",
+            f"Which would you like? ({multi_question['uuid']})",
+        ]
+        by_survey = {row[0]: row[2:] for row in rows[1:]}
+        assert by_survey == {
+            survey["uuid"]: ["Hello", "a;c"],
+            other_survey["uuid"]: ["", "b"],
+        }
+
+    def test_get_survey_responses_wide_parquet(
+        self, client: FlaskClient, jwt_system: str
+    ) -> None:
+        response = client.get(
+            "/dhos/v1/survey_responses?layout=wide&format=parquet",
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 400
+
+    @pytest.mark.usefixtures("export_jobs")
+    def test_survey_responses_job(
+        self,
+        client: FlaskClient,
+        question_good: Dict,
+        jwt_system: str,
+        survey: Dict,
+    ) -> None:
+        answer_controller.create_answers(
+            answers=[
+                {
+                    "question_id": question_good["uuid"],
+                    "survey_id": survey["uuid"],
+                    "value": "234578923987456",
+                }
+            ]
+        )
+        response = client.post(
+            "/dhos/v1/survey_responses/job",
+            json={"start_date": "2020-01-01"},
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 202
+        assert response.json is not None
+        job_id: str = response.json["job_id"]
+        assert response.headers["Location"].endswith(
+            f"/dhos/v1/survey_responses/job/{job_id}"
+        )
+        job: Dict = wait_for_job(client, job_id)
+        assert job["status"] == "complete"
+        assert job["format"] == "csv"
+
+        response = client.get(
+            f"/dhos/v1/survey_responses/job/{job_id}/download",
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 200
+        assert response.headers["Content-Type"] == "text/csv; charset=utf-8"
+        assert "234578923987456" in response.data.decode("utf8")
+        assert len(response.data) == job["size"]
+        data: bytes = response.data
+
+        # An interrupted download can be resumed from where it stopped.
+        response = client.get(
+            f"/dhos/v1/survey_responses/job/{job_id}/download",
+            headers={"Authorization": "Bearer TOKEN", "Range": "bytes=10-"},
+        )
+        assert response.status_code == 206
+        assert response.data == data[10:]
+
+        response = client.get(
+            f"/dhos/v1/survey_responses/job/{job_id}/download",
+            headers={"Authorization": "Bearer TOKEN", "If-None-Match": f'"{job_id}"'},
+        )
+        assert response.status_code == 304
+
+    def test_survey_responses_job_reused(
+        self,
+        client: FlaskClient,
+        question_good: Dict,
+        jwt_system: str,
+        survey: Dict,
+        export_jobs: ExportJobs,
+        mocker: MockFixture,
+    ) -> None:
+        answers = answer_controller.create_answers(
+            answers=[
+                {
+                    "question_id": question_good["uuid"],
+                    "survey_id": survey["uuid"],
+                    "value": "1234",
+                }
+            ]
+        )
+        response = client.post(
+            "/dhos/v1/survey_responses/job",
+            json={},
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.json is not None
+        job_id: str = response.json["job_id"]
+        assert wait_for_job(client, job_id)["status"] == "complete"
+
+        # The finished export is reused until the answers change.
+        spy = mocker.spy(export_jobs, "submit")
+        response = client.post(
+            "/dhos/v1/survey_responses/job",
+            json={},
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.json is not None
+        assert response.json["job_id"] == job_id
+        assert response.json["status"] == "complete"
+        assert spy.call_count == 0
+
+        answer_controller.update_answer(answers[0]["uuid"], {"value": "5678"})
+        response = client.post(
+            "/dhos/v1/survey_responses/job",
+            json={},
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.json is not None
+        assert response.json["job_id"] != job_id
+        assert wait_for_job(client, response.json["job_id"])["status"] == "complete"
+        assert spy.call_count == 1
+
+    @pytest.mark.usefixtures("export_jobs")
+    def test_survey_responses_job_failed(
+        self, client: FlaskClient, jwt_system: str, mocker: MockFixture
+    ) -> None:
+        def failing_export() -> Any:
+            yield b"survey_id"
+            raise IOError("Database went away")
+
+        mocker.patch.object(
+            survey_controller, "get_survey_responses", return_value=failing_export()
+        )
+        response = client.post(
+            "/dhos/v1/survey_responses/job",
+            json={},
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.json is not None
+        job_id: str = response.json["job_id"]
+        assert wait_for_job(client, job_id)["status"] == "failed"
+
+        response = client.get(
+            f"/dhos/v1/survey_responses/job/{job_id}/download",
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 409
+
+    def test_survey_responses_job_shared_between_instances(
+        self, export_jobs: ExportJobs
+    ) -> None:
+        other_instance = ExportJobs(
+            directory=export_jobs.directory,
+            workers=1,
+            max_age_seconds=export_jobs.max_age_seconds,
+            stale_seconds=export_jobs.stale_seconds,
+        )
+        job_id: str = "a" * 64
+        release = threading.Event()
+
+        def slow_export() -> Any:
+            yield b"survey_id\n"
+            release.wait(timeout=5)
+
+        future = export_jobs.submit(job_id, {"format": "csv"}, slow_export())
+        assert future is not None
+        # Another instance sees the job running, and does not start it again.
+        assert other_instance.get(job_id)["status"] == "running"  # type: ignore
+        assert other_instance.submit(job_id, {"format": "csv"}, iter([])) is None
+        release.set()
+        future.result(timeout=5)
+        assert other_instance.get(job_id)["status"] == "complete"  # type: ignore
+
+    def test_survey_responses_job_queued(self, export_jobs: ExportJobs) -> None:
+        queued_jobs = ExportJobs(
+            directory=export_jobs.directory,
+            workers=1,
+            max_age_seconds=export_jobs.max_age_seconds,
+            stale_seconds=1,
+        )
+        release = threading.Event()
+
+        def slow_export() -> Any:
+            yield b"survey_id\n"
+            release.wait(timeout=5)
+
+        running = queued_jobs.submit("c" * 64, {"format": "csv"}, slow_export())
+        queued = queued_jobs.submit("d" * 64, {"format": "csv"}, iter([b"survey_id"]))
+        assert running is not None and queued is not None
+        # A job waiting for a worker is not taken to have been interrupted.
+        time.sleep(2)
+        assert queued_jobs.get("d" * 64)["status"] == "running"  # type: ignore
+        assert queued_jobs.submit("d" * 64, {"format": "csv"}, iter([])) is None
+        release.set()
+        running.result(timeout=5)
+        queued.result(timeout=5)
+        assert queued_jobs.get("d" * 64)["status"] == "complete"  # type: ignore
+
+    def test_survey_responses_job_interrupted(self, export_jobs: ExportJobs) -> None:
+        job_id: str = "b" * 64
+        with open(export_jobs.path(job_id, "json"), "w") as f:
+            f.write('{"format": "csv"}')
+        # Left behind by an instance that stopped while writing the export.
+        part_path: str = export_jobs.path(job_id, "part")
+        open(part_path, "wb").close()
+        stale: float = time.time() - export_jobs.stale_seconds - 1
+        os.utime(part_path, (stale, stale))
+        assert export_jobs.get(job_id)["status"] == "failed"  # type: ignore
+
+        future = export_jobs.submit(job_id, {"format": "csv"}, iter([b"survey_id"]))
+        assert future is not None
+        future.result(timeout=5)
+        assert export_jobs.get(job_id)["status"] == "complete"  # type: ignore
+
+    @pytest.mark.usefixtures("export_jobs")
+    def test_survey_responses_job_not_found(
+        self, client: FlaskClient, jwt_system: str
+    ) -> None:
+        response = client.get(
+            f"/dhos/v1/survey_responses/job/{'0' * 64}",
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 404
+
+    @pytest.mark.usefixtures("export_jobs")
+    def test_survey_responses_job_wide_parquet(
+        self, client: FlaskClient, jwt_system: str
+    ) -> None:
+        response = client.post(
+            "/dhos/v1/survey_responses/job",
+            json={"layout": "wide", "format": "parquet"},
+            headers={"Authorization": "Bearer TOKEN"},
+        )
+        assert response.status_code == 400